@@ -1,44 +1,116 @@
 from __future__ import annotations
 import sqlite3
+import threading
 from contextlib import contextmanager
 from typing import Generator
 import streamlit as st
-from .schema import CREATE_TABLES_SQL
+from .schema import CREATE_TABLES_SQL, ADDED_COLUMNS, BACKFILL_SQL, DEDUPE_SQL
+
+# Incremented after every committed write. Cached reads take it as an
+# argument so they miss once the data changes; st.cache_data is shared by
+# all sessions, so the counter lives at module level, not in session state.
+# Entries for old versions are never read again, so every loader keyed on
+# it sets max_entries to let Streamlit evict them.
+_data_version = 0
+_data_version_lock = threading.Lock()
+
+def get_data_version() -> int:
+    """Current data version token for cache keys"""
+    return _data_version
+
+def _bump_data_version() -> None:
+    global _data_version
+    with _data_version_lock:
+        _data_version += 1
  
 class DatabaseConnection:
     def __init__(self, db_path: str = 'rag_settings.db'):
         self.db_path = db_path
+        # A single connection is reused for every cursor; transactions are
+        # opened explicitly in get_cursor, hence isolation_level=None. The
+        # statement cache is sized to hold every query the models issue.
+        self._conn = sqlite3.connect(
+            db_path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=256
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        self._configure_connection()
         self.init_db()  # Initialize schema on connection creation
 
+    def _configure_connection(self) -> None:
+        """Apply per-connection settings, once for the connection's lifetime"""
+        # WAL avoids the second fsync per commit and synchronous=NORMAL only
+        # syncs at checkpoints; mmap serves hot pages without read() calls
+        self._conn.executescript('''
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            PRAGMA mmap_size = 268435456;
+            PRAGMA cache_size = -32000;
+            PRAGMA temp_store = MEMORY;
+            PRAGMA foreign_keys = ON;
+        ''')
+
     def init_db(self) -> None:
         """Initialize database with schema"""
         with self.get_cursor() as cursor:
-            for table_sql in CREATE_TABLES_SQL.values():
+            cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'index')")
+            existing = {row[0] for row in cursor.fetchall()}
+            for table, table_sql in CREATE_TABLES_SQL.items():
+                if table in DEDUPE_SQL and table not in existing:
+                    cursor.execute(DEDUPE_SQL[table])
                 cursor.execute(table_sql)
+                self._add_missing_columns(cursor, table)
+
+    def _add_missing_columns(self, cursor: sqlite3.Cursor, table: str) -> None:
+        """Bring a table created by an older schema up to date"""
+        columns = ADDED_COLUMNS.get(table)
+        if not columns:
+            return
+        cursor.execute(f'PRAGMA table_info({table})')
+        existing = {row[1] for row in cursor.fetchall()}
+        missing = [name for name in columns if name not in existing]
+        for name in missing:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {name} {columns[name]}')
+        if missing and table in BACKFILL_SQL:
+            cursor.execute(BACKFILL_SQL[table])
                 
     @contextmanager
     def get_connection(self) -> Generator[sqlite3.Connection, None, None]:
-        """Context manager for database connections"""
-        conn = sqlite3.connect(self.db_path)
-        try:
-            yield conn
-        finally:
-            conn.close()
+        """Context manager granting exclusive use of the shared connection"""
+        with self._lock:
+            yield self._conn
     
     @contextmanager
     def get_cursor(self) -> Generator[sqlite3.Cursor, None, None]:
-        """Context manager for database cursors"""
+        """Context manager for a cursor running inside a transaction
+
+        A cursor requested while a transaction is already open on this
+        thread joins it and leaves the commit to the outermost caller.
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            if conn.in_transaction:
+                yield cursor
+                return
+            changes = conn.total_changes
+            cursor.execute('BEGIN')
             try:
                 yield cursor
                 conn.commit()
+                if conn.total_changes != changes:
+                    _bump_data_version()
             except Exception as e:
                 conn.rollback()
                 raise e
 
+    def close(self) -> None:
+        """Close the underlying connection"""
+        self._conn.close()
+
+@st.cache_resource(show_spinner=False)
 def get_db() -> DatabaseConnection:
-    """Get or create Database instance from session state"""
-    if 'database' not in st.session_state:
-        st.session_state.database = DatabaseConnection()
-    return st.session_state.database
\ No newline at end of file
+    """Shared Database instance, created and initialized once per process"""
+    return DatabaseConnection()
\ No newline at end of file
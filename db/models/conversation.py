@@ -1,57 +1,164 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, List, Dict
-import json
+from typing import Optional, List, Dict, NamedTuple
 import streamlit as st
+from ..connection import get_data_version, get_db
+from ..serialization import json_loads
 
-@dataclass
+class ConvSummary(NamedTuple):
+    """The columns a conversation list needs, as a plain tuple"""
+    id: int
+    title: str
+    updated_at: str
+    preview: str
+    message_count: int
+    updated_display: str  # updated_at as 'YYYY-MM-DD HH:MM', formatted by SQLite
+
+# Selected columns matching ConvSummary's fields
+_SUMMARY_COLUMNS = '''
+    id,
+    COALESCE(title, 'New Conversation'),
+    updated_at,
+    COALESCE(last_message_preview, ''),
+    message_count,
+    strftime('%Y-%m-%d %H:%M', updated_at)
+'''
+
+@dataclass(slots=True)
 class Conversation:
     id: Optional[int] = None
     title: Optional[str] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
-    metadata: Optional[Dict] = None
+    metadata: Optional[str] = None  # Raw JSON, decoded on demand by metadata_dict
     preview: Optional[str] = None  # Added for latest message preview
     message_count: Optional[int] = None  # Added for message count
+    _metadata_dict: Optional[Dict] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def metadata_dict(self) -> Dict:
+        """Conversation metadata, decoded from JSON on first access"""
+        if self._metadata_dict is None:
+            self._metadata_dict = json_loads(self.metadata) if self.metadata else {}
+        return self._metadata_dict
+
+    @classmethod
+    def create(cls) -> 'Conversation':
+        """Create a new, empty conversation"""
+        with get_db().get_cursor() as cursor:
+            cursor.execute('''
+                INSERT INTO conversations (created_at, updated_at)
+                VALUES (CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+            ''')
+            return cls(id=cursor.lastrowid, preview='', message_count=0)
 
     @classmethod
     def get_all(cls) -> List['Conversation']:
         """Get all conversations with their latest messages"""
-        with st.session_state.database.get_cursor() as cursor:
+        return _load_conversations(get_data_version())
+
+    @classmethod
+    def get_page(cls, limit: int = 50, offset: int = 0) -> List['Conversation']:
+        """Get one page of conversations, most recently updated first"""
+        return _load_conversations(get_data_version(), limit, offset)
+
+    @classmethod
+    def list_summaries(cls, limit: int = 50, offset: int = 0) -> List[ConvSummary]:
+        """Get lightweight summaries of the most recently updated conversations"""
+        return _load_summaries(get_data_version(), limit, offset)
+
+    @classmethod
+    def get_summary(cls, conversation_id: int) -> Optional[ConvSummary]:
+        """Get one conversation's summary, wherever it falls in the list"""
+        return _load_summary(get_data_version(), conversation_id)
+
+    @classmethod
+    def get_latest_id(cls) -> Optional[int]:
+        """Get the most recently updated conversation's ID"""
+        with get_db().get_cursor() as cursor:
+            # A single seek on idx_conversations_updated
             cursor.execute('''
-                SELECT 
-                    c.id,
-                    c.title,
-                    c.created_at,
-                    c.updated_at,
-                    c.metadata,
-                    m.content as latest_message,
-                    COUNT(messages.id) as message_count
-                FROM conversations c
-                LEFT JOIN messages ON c.id = messages.conversation_id
-                LEFT JOIN (
-                    SELECT conversation_id, content
-                    FROM messages m2
-                    WHERE (conversation_id, created_at) IN (
-                        SELECT conversation_id, MAX(created_at)
-                        FROM messages
-                        GROUP BY conversation_id
-                    )
-                ) m ON c.id = m.conversation_id
-                GROUP BY c.id
-                ORDER BY c.updated_at DESC
+                SELECT id
+                FROM conversations
+                ORDER BY updated_at DESC
+                LIMIT 1
             ''')
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+    @classmethod
+    def _fetch_summaries(cls, limit: int, offset: int) -> List[ConvSummary]:
+        """Query conversation summaries, bypassing the cache"""
+        with get_db().get_cursor() as cursor:
+            cursor.execute(f'''
+                SELECT {_SUMMARY_COLUMNS}
+                FROM conversations
+                ORDER BY updated_at DESC
+                LIMIT ? OFFSET ?
+            ''', (limit, offset))
+            return [ConvSummary._make(row) for row in cursor]
+
+    @classmethod
+    def _fetch_summary(cls, conversation_id: int) -> Optional[ConvSummary]:
+        """Query one conversation's summary, bypassing the cache"""
+        with get_db().get_cursor() as cursor:
+            cursor.execute(f'''
+                SELECT {_SUMMARY_COLUMNS}
+                FROM conversations
+                WHERE id = ?
+            ''', (conversation_id,))
+            row = cursor.fetchone()
+            return ConvSummary._make(row) if row else None
+
+    @classmethod
+    def _fetch_all(cls, limit: int = -1, offset: int = 0) -> List['Conversation']:
+        """Query conversations, bypassing the cache; a negative limit returns all"""
+        with get_db().get_cursor() as cursor:
+            cursor.execute('''
+                SELECT 
+                    id,
+                    title,
+                    created_at,
+                    updated_at,
+                    metadata,
+                    last_message_preview,
+                    message_count
+                FROM conversations
+                ORDER BY updated_at DESC
+                LIMIT ? OFFSET ?
+            ''', (limit, offset))
             
-            conversations = []
-            for row in cursor.fetchall():
-                preview = row[5][:50] + "..." if row[5] and len(row[5]) > 50 else (row[5] or '')
-                conversations.append(cls(
+            return [
+                cls(
                     id=row[0],
                     title=row[1] or 'New Conversation',
                     created_at=row[2],
                     updated_at=row[3],
-                    metadata=json.loads(row[4]) if row[4] else {},
-                    preview=preview,
+                    metadata=row[4],
+                    preview=row[5] or '',
                     message_count=row[6]
-                ))
-            return conversations
\ No newline at end of file
+                )
+                for row in cursor
+            ]
+
+    def delete(self) -> None:
+        """Delete conversation along with its messages and feedback"""
+        if not self.id:
+            raise ValueError("Cannot delete conversation without ID")
+        with get_db().get_cursor() as cursor:
+            cursor.execute('DELETE FROM conversations WHERE id = ?', (self.id,))
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _load_conversations(version: int, limit: int = -1, offset: int = 0) -> List[Conversation]:
+    """Cached conversation list; a new data version forces a reload"""
+    return Conversation._fetch_all(limit, offset)
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _load_summaries(version: int, limit: int, offset: int) -> List[ConvSummary]:
+    """Cached conversation summaries; a new data version forces a reload"""
+    return Conversation._fetch_summaries(limit, offset)
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _load_summary(version: int, conversation_id: int) -> Optional[ConvSummary]:
+    """Cached summary of one conversation; a new data version forces a reload"""
+    return Conversation._fetch_summary(conversation_id)
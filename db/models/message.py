@@ -2,9 +2,11 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional, List, Dict
 import streamlit as st
+from ..connection import get_data_version, get_db
 from .message_source import MessageSource
+from ..serialization import json_loads
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     conversation_id: int
     role: str
@@ -15,24 +17,47 @@ class Message:
     message_order: Optional[int] = None
     created_at: Optional[datetime] = None
     sources: List['MessageSource'] = field(default_factory=list)
+    # Feedback preloaded by get_conversation_messages; None means not loaded
+    _feedback: Optional[Dict] = field(default=None, init=False, repr=False, compare=False)
+    # Rendered source list; sources don't change after saving
+    _sources_markdown: Optional[str] = field(default=None, init=False, repr=False, compare=False)
 
     @classmethod
     def get_conversation_messages(cls, conversation_id: int) -> List['Message']:
         """Get all messages in a conversation with their sources"""
-        with st.session_state.database.get_cursor() as cursor:
+        return _load_messages(get_data_version(), conversation_id)
+
+    @classmethod
+    def _fetch_conversation_messages(cls, conversation_id: int) -> List['Message']:
+        """Query a conversation's messages and feedback, bypassing the cache"""
+        with get_db().get_cursor() as cursor:
+            # Sources are aggregated into one JSON array per message row
             cursor.execute('''
                 SELECT 
-                    id, conversation_id, role, content,
-                    model_version, confidence, created_at,
-                    message_order
-                FROM messages
-                WHERE conversation_id = ?
-                ORDER BY message_order
+                    m.id, m.conversation_id, m.role, m.content,
+                    m.model_version, m.confidence, m.created_at,
+                    m.message_order,
+                    (
+                        SELECT json_group_array(json_object(
+                            'id', ms.id,
+                            'title', ms.title,
+                            'url', ms.url,
+                            'content', ms.content,
+                            'relevance_score', ms.relevance_score
+                        ))
+                        FROM (
+                            SELECT * FROM message_sources
+                            WHERE message_id = m.id
+                            ORDER BY id
+                        ) ms
+                    ) AS sources_json
+                FROM messages m
+                WHERE m.conversation_id = ?
+                ORDER BY m.message_order
             ''', (conversation_id,))
             
-            messages = []
-            for row in cursor.fetchall():
-                message = cls(
+            messages = [
+                cls(
                     id=row[0],
                     conversation_id=row[1],
                     role=row[2],
@@ -40,22 +65,104 @@ class Message:
                     model_version=row[4],
                     confidence=row[5],
                     created_at=row[6],
-                    message_order=row[7]
+                    message_order=row[7],
+                    sources=[
+                        MessageSource(message_id=row[0], **source)
+                        for source in json_loads(row[8])
+                    ]
                 )
-                # Get sources for this message
-                message.sources = MessageSource.get_for_message(message.id)
-                messages.append(message)
+                for row in cursor
+            ]
+
+            # Fill per-message extras here so the cached list carries them
+            feedback = cls.bulk_feedback(conversation_id)
+            for message in messages:
+                message._feedback = feedback.get(message.id)
+                message.sources_markdown()
             return messages
 
+    @classmethod
+    def bulk_feedback(cls, conversation_id: int) -> Dict[int, Dict]:
+        """Get answer and source feedback for every message in a conversation
+
+        Returns {message_id: {'feedback': dict or None, 'source_ratings': {source_id: rating}}}
+        """
+        with get_db().get_cursor() as cursor:
+            cursor.execute('''
+                SELECT
+                    m.id, mf.id, mf.answer_relevance, mf.answer_accuracy,
+                    mf.feedback_text, ms.id, sf.rating
+                FROM messages m
+                LEFT JOIN message_feedback mf ON mf.message_id = m.id
+                LEFT JOIN message_sources ms ON ms.message_id = m.id
+                LEFT JOIN source_feedback sf ON sf.message_source_id = ms.id
+                WHERE m.conversation_id = ?
+            ''', (conversation_id,))
+
+            feedback = {}
+            for row in cursor.fetchall():
+                entry = feedback.setdefault(row[0], {'feedback': None, 'source_ratings': {}})
+                if row[1] is not None:
+                    entry['feedback'] = {
+                        'relevance': row[2],
+                        'accuracy': row[3],
+                        'feedback_text': row[4] or ''
+                    }
+                if row[6] is not None:  # if there's a rating
+                    entry['source_ratings'][row[5]] = row[6]
+            return feedback
+
+    @classmethod
+    def get_next_order(cls, conversation_id: int) -> int:
+        """Get the message_order the next message in a conversation should use"""
+        with get_db().get_cursor() as cursor:
+            cursor.execute('''
+                SELECT COALESCE(MAX(message_order), -1) + 1
+                FROM messages
+                WHERE conversation_id = ?
+            ''', (conversation_id,))
+            return cursor.fetchone()[0]
+
+    def save(self) -> None:
+        """Save a new message; a trigger refreshes its conversation's list summary"""
+        with get_db().get_cursor() as cursor:
+            if self.message_order is None:
+                self.message_order = self.get_next_order(self.conversation_id)
+
+            cursor.execute('''
+                INSERT INTO messages (
+                    conversation_id, role, content,
+                    model_version, confidence, message_order
+                ) VALUES (?, ?, ?, ?, ?, ?)
+            ''', (
+                self.conversation_id, self.role, self.content,
+                self.model_version, self.confidence, self.message_order
+            ))
+            self.id = cursor.lastrowid
+
+    def sources_markdown(self) -> str:
+        """Source references formatted for display in markdown"""
+        if self._sources_markdown is None:
+            self._sources_markdown = "\n".join(
+                f"- [{source.title}]({source.url}) (Relevance: {round(source.relevance_score or 0, 2)})"
+                if source.url else
+                f"- {source.title} (Relevance: {round(source.relevance_score or 0, 2)})"
+                for source in self.sources
+            ) or "No sources available"
+        return self._sources_markdown
+
     def has_feedback(self) -> bool:
         """Check if feedback exists for this message"""
         if not self.id:
             return False
+        if self._feedback is not None:
+            return self._feedback['feedback'] is not None
             
-        with st.session_state.database.get_cursor() as cursor:
+        with get_db().get_cursor() as cursor:
             cursor.execute('''
-                SELECT id FROM message_feedback 
+                SELECT 1 FROM message_feedback 
                 WHERE message_id = ?
+                LIMIT 1
             ''', (self.id,))
             return cursor.fetchone() is not None
 
@@ -63,8 +170,10 @@ class Message:
         """Get existing feedback for this message"""
         if not self.id:
             return None
+        if self._feedback is not None:
+            return self._feedback['feedback']
             
-        with st.session_state.database.get_cursor() as cursor:
+        with get_db().get_cursor() as cursor:
             cursor.execute('''
                 SELECT answer_relevance, answer_accuracy, feedback_text
                 FROM message_feedback 
@@ -83,9 +192,11 @@ class Message:
         """Get existing source feedback for this message's sources"""
         if not self.id:
             return {}
+        if self._feedback is not None:
+            return dict(self._feedback['source_ratings'])
             
         source_ratings = {}
-        with st.session_state.database.get_cursor() as cursor:
+        with get_db().get_cursor() as cursor:
             cursor.execute('''
                 SELECT ms.id, sf.rating
                 FROM message_sources ms
@@ -95,4 +206,10 @@ class Message:
             for row in cursor.fetchall():
                 if row[1] is not None:  # if there's a rating
                     source_ratings[row[0]] = row[1]
-        return source_ratings
\ No newline at end of file
+        return source_ratings
+
+# One entry per conversation being viewed; each chat turn supersedes the last
+@st.cache_data(show_spinner=False, max_entries=32)
+def _load_messages(version: int, conversation_id: int) -> List[Message]:
+    """Cached conversation messages; a new data version forces a reload"""
+    return Message._fetch_conversation_messages(conversation_id)
@@ -1,7 +1,8 @@
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
-import streamlit as st
+import sqlite3
+from ..connection import get_db
 
 @dataclass
 class MessageFeedback:
@@ -18,9 +19,32 @@ class MessageFeedback:
        if not (1 <= self.answer_accuracy <= 5):
            raise ValueError("answer_accuracy must be between 1 and 5")
 
+   @classmethod
+   def from_row(cls, row: sqlite3.Row) -> 'MessageFeedback':
+       """Build from a database row without re-running validation.
+
+       The schema's CHECK constraints already guarantee the ranges.
+       """
+       feedback = object.__new__(cls)
+       feedback.__dict__.update(dict(row))
+       return feedback
+
+   @classmethod
+   def get_for_message(cls, message_id: int) -> Optional['MessageFeedback']:
+       """Get the feedback left on a message, if any"""
+       with get_db().get_cursor() as cursor:
+           cursor.execute('''
+               SELECT id, message_id, answer_relevance, answer_accuracy,
+                      feedback_text, created_at
+               FROM message_feedback
+               WHERE message_id = ?
+           ''', (message_id,))
+           row = cursor.fetchone()
+           return cls.from_row(row) if row else None
+
    def save(self) -> None:
        """Save feedback to database"""
-       with st.session_state.database.get_cursor() as cursor:
+       with get_db().get_cursor() as cursor:
            if self.id:
                cursor.execute('''
                    UPDATE message_feedback SET 
@@ -32,13 +56,20 @@ class MessageFeedback:
                    self.feedback_text, self.id
                ))
            else:
+               # One feedback row per message: resubmitting replaces it
                cursor.execute('''
                    INSERT INTO message_feedback (
                        message_id, answer_relevance, answer_accuracy,
                        feedback_text, created_at
                    ) VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                   ON CONFLICT (message_id) DO UPDATE SET
+                       answer_relevance = excluded.answer_relevance,
+                       answer_accuracy = excluded.answer_accuracy,
+                       feedback_text = excluded.feedback_text,
+                       created_at = excluded.created_at
+                   RETURNING id
                ''', (
                    self.message_id, self.answer_relevance, 
                    self.answer_accuracy, self.feedback_text
                ))
-               self.id = cursor.lastrowid
\ No newline at end of file
+               self.id = cursor.fetchone()[0]
\ No newline at end of file
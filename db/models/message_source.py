@@ -1,8 +1,8 @@
 from dataclasses import dataclass
 from typing import Optional, List
-import streamlit as st
+from ..connection import get_db
 
-@dataclass
+@dataclass(slots=True)
 class MessageSource:
    message_id: int
    title: str
@@ -14,28 +14,18 @@ class MessageSource:
    @classmethod
    def get_for_message(cls, message_id: int) -> List['MessageSource']:
        """Get all sources for a message"""
-       with st.session_state.database.get_cursor() as cursor:
+       with get_db().get_cursor() as cursor:
            cursor.execute('''
                SELECT id, message_id, title, url, content, relevance_score
                FROM message_sources
                WHERE message_id = ?
            ''', (message_id,))
            
-           return [
-               cls(
-                   id=row[0],
-                   message_id=row[1],
-                   title=row[2],
-                   url=row[3],
-                   content=row[4],
-                   relevance_score=row[5]
-               )
-               for row in cursor.fetchall()
-           ]
+           return [cls(**dict(row)) for row in cursor]
 
    def save(self) -> None:
        """Save source to database"""
-       with st.session_state.database.get_cursor() as cursor:
+       with get_db().get_cursor() as cursor:
            if self.id:
                cursor.execute('''
                    UPDATE message_sources 
@@ -56,10 +46,26 @@ class MessageSource:
                ))
                self.id = cursor.lastrowid
 
-   def delete(self) -> None:
-       """Delete source from database"""
+   @classmethod
+   def bulk_insert(cls, sources: List['MessageSource']) -> None:
+       """Insert many new sources in a single transaction"""
+       if not sources:
+           return
+       with get_db().get_cursor() as cursor:
+           cursor.executemany('''
+               INSERT INTO message_sources (
+                   message_id, title, url, content, relevance_score
+               ) VALUES (?, ?, ?, ?, ?)
+           ''', [(
+               source.message_id, source.title, source.url,
+               source.content, source.relevance_score
+           ) for source in sources])
+
+   def delete(self) -> bool:
+       """Delete source and its ratings; returns whether a row was deleted"""
        if not self.id:
            raise ValueError("Cannot delete source without ID")
            
-       with st.session_state.database.get_cursor() as cursor:
-           cursor.execute('DELETE FROM message_sources WHERE id = ?', (self.id,))
\ No newline at end of file
+       with get_db().get_cursor() as cursor:
+           cursor.execute('DELETE FROM message_sources WHERE id = ? RETURNING id', (self.id,))
+           return cursor.fetchone() is not None
\ No newline at end of file
@@ -1,8 +1,22 @@
 from dataclasses import dataclass
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
 import streamlit as st
+from ..connection import get_data_version, get_db
 
-@dataclass
+_INSERT_SQL = '''
+   INSERT INTO sections (
+       url_id, parent_id, title, content, 
+       level, url_fragment, section_order, depth, path
+   ) VALUES (
+       :url_id, :parent_id, :title, :content,
+       :level, :url_fragment, :section_order,
+       COALESCE((SELECT depth + 1 FROM sections WHERE id = :parent_id), 0),
+       COALESCE((SELECT path || ' > ' || :title FROM sections WHERE id = :parent_id), :title)
+   )
+   RETURNING id, depth, path
+'''
+
+@dataclass(slots=True)
 class Section:
    title: str
    content: str
@@ -18,79 +32,132 @@ class Section:
    @classmethod
    def get_by_url(cls, url_id: int) -> List['Section']:
        """Get all sections for a URL in hierarchical order"""
-       with st.session_state.database.get_cursor() as cursor:
-           cursor.execute('''
-               WITH RECURSIVE section_tree AS (
-                   SELECT 
-                       id, url_id, parent_id, title, content, level,
-                       url_fragment, section_order, 0 as depth,
-                       title as path
-                   FROM sections 
-                   WHERE url_id = ? AND parent_id IS NULL
-                   
-                   UNION ALL
-                   
-                   SELECT 
-                       s.id, s.url_id, s.parent_id, s.title, s.content, s.level,
-                       s.url_fragment, s.section_order,
-                       st.depth + 1,
-                       st.path || ' > ' || s.title
-                   FROM sections s
-                   JOIN section_tree st ON s.parent_id = st.id
-               )
-               SELECT *
-               FROM section_tree
-               ORDER BY section_order, depth;
-           ''', (url_id,))
+       return cls.get_by_urls([url_id]).get(url_id, [])
+
+   @classmethod
+   def get_by_urls(cls, url_ids: List[int]) -> Dict[int, List['Section']]:
+       """Get the sections of several URLs in one query, keyed by url_id"""
+       if not url_ids:
+           return {}
+       return _load_sections(get_data_version(), tuple(url_ids))
+
+   @classmethod
+   def _fetch_by_urls(cls, url_ids: Tuple[int, ...]) -> Dict[int, List['Section']]:
+       """Query sections for the given URLs, bypassing the cache"""
+       placeholders = ', '.join('?' * len(url_ids))
+       with get_db().get_cursor() as cursor:
+           cursor.execute(f'''
+               SELECT 
+                   id, url_id, parent_id, title, content, level,
+                   url_fragment, section_order, depth, path
+               FROM sections
+               WHERE url_id IN ({placeholders})
+               ORDER BY url_id, section_order, depth
+           ''', url_ids)
            
-           return [
-               cls(
-                   id=row[0],
-                   url_id=row[1],
-                   parent_id=row[2],
-                   title=row[3],
-                   content=row[4],
-                   level=row[5],
-                   url_fragment=row[6],
-                   section_order=row[7],
-                   depth=row[8],
-                   path=row[9]
-               )
-               for row in cursor.fetchall()
-           ]
+           sections = {}
+           for row in cursor:
+               sections.setdefault(row['url_id'], []).append(cls(**dict(row)))
+           return sections
+
+   def save(self) -> bool:
+       """Save section to database.
 
-   def save(self) -> None:
-       """Save section to database"""
+       Returns whether a row was written; False if the section being
+       updated no longer exists, e.g. after its URL was deleted.
+       """
        if not self.url_id:
            raise ValueError("Cannot save section without url_id")
 
-       with st.session_state.database.get_cursor() as cursor:
+       # depth and path are derived from the parent row as the section is written
+       with get_db().get_cursor() as cursor:
            if self.id:
                cursor.execute('''
                    UPDATE sections SET 
-                       url_id = ?, parent_id = ?, title = ?, content = ?,
-                       level = ?, url_fragment = ?, section_order = ?
-                   WHERE id = ?
-               ''', (
-                   self.url_id, self.parent_id, self.title, self.content,
-                   self.level, self.url_fragment, self.section_order, self.id
-               ))
+                       url_id = :url_id, parent_id = :parent_id, title = :title,
+                       content = :content, level = :level,
+                       url_fragment = :url_fragment, section_order = :section_order,
+                       depth = COALESCE((SELECT depth + 1 FROM sections WHERE id = :parent_id), 0),
+                       path = COALESCE((SELECT path || ' > ' || :title FROM sections WHERE id = :parent_id), :title)
+                   WHERE id = :id
+                   RETURNING id, depth, path
+               ''', self._params())
            else:
-               cursor.execute('''
-                   INSERT INTO sections (
-                       url_id, parent_id, title, content, 
-                       level, url_fragment, section_order
-                   ) VALUES (?, ?, ?, ?, ?, ?, ?)
-               ''', (
-                   self.url_id, self.parent_id, self.title, self.content,
-                   self.level, self.url_fragment, self.section_order
-               ))
-               self.id = cursor.lastrowid
+               cursor.execute(_INSERT_SQL, self._params())
+           row = cursor.fetchone()
+           if row is None:
+               return False
+           self.id, self.depth, self.path = row
+           return True
+
+   @classmethod
+   def bulk_save(cls, sections: List['Section'], url_id: int) -> List['Section']:
+       """Insert a URL's freshly scraped sections in a single transaction.
+
+       Sections come in document order with depth and path already set by
+       the scraper. Assigns url_id and section_order from list position and
+       fills in the generated id and parent_id on each section.
+       """
+       if not sections:
+           return sections
+       for i, section in enumerate(sections):
+           section.url_id = url_id
+           section.section_order = i
+
+       with get_db().get_cursor() as cursor:
+           cursor.executemany('''
+               INSERT INTO sections (
+                   url_id, title, content, level,
+                   url_fragment, section_order, depth, path
+               ) VALUES (
+                   :url_id, :title, :content, :level,
+                   :url_fragment, :section_order, :depth, :path
+               )
+           ''', [{**section._params(), 'depth': section.depth, 'path': section.path}
+                 for section in sections])
+
+           # The transaction holds the write lock, so the newest ids for
+           # this URL are exactly the rows just inserted
+           cursor.execute('''
+               SELECT id FROM sections
+               WHERE url_id = ?
+               ORDER BY id DESC
+               LIMIT ?
+           ''', (url_id, len(sections)))
+           ids = [row[0] for row in cursor.fetchall()]
+
+           # A section's parent is the closest earlier section one level
+           # shallower
+           ancestors = []
+           for section, section_id in zip(sections, reversed(ids)):
+               section.id = section_id
+               del ancestors[section.depth:]
+               section.parent_id = ancestors[-1].id if ancestors else None
+               ancestors.append(section)
+
+           cursor.executemany(
+               'UPDATE sections SET parent_id = ? WHERE id = ?',
+               [(section.parent_id, section.id) for section in sections if section.parent_id]
+           )
+       return sections
+
+   def _params(self) -> dict:
+       """Named query parameters for this section"""
+       return {
+           'id': self.id,
+           'url_id': self.url_id,
+           'parent_id': self.parent_id,
+           'title': self.title,
+           'content': self.content,
+           'level': self.level,
+           'url_fragment': self.url_fragment,
+           'section_order': self.section_order
+       }
 
    @classmethod
    def delete_by_url(cls, url_id: int) -> None:
        """Delete all sections for a URL"""
-       with st.session_state.database.get_cursor() as cursor:
+       with get_db().get_cursor() as cursor:
            cursor.execute('DELETE FROM sections WHERE url_id = ?', (url_id,))
 
    def delete(self) -> None:
@@ -98,5 +165,10 @@ class Section:
        if not self.id:
            raise ValueError("Cannot delete section without ID")
            
-       with st.session_state.database.get_cursor() as cursor:
-           cursor.execute('DELETE FROM sections WHERE id = ?', (self.id,))
\ No newline at end of file
+       with get_db().get_cursor() as cursor:
+           cursor.execute('DELETE FROM sections WHERE id = ?', (self.id,))
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _load_sections(version: int, url_ids: Tuple[int, ...]) -> Dict[int, List[Section]]:
+   """Cached sections of the given URLs; a new data version forces a reload"""
+   return Section._fetch_by_urls(url_ids)
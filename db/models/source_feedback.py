@@ -1,7 +1,8 @@
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
-import streamlit as st
+from typing import Optional, List
+import sqlite3
+from ..connection import get_db
 
 @dataclass
 class SourceFeedback:
@@ -14,9 +15,31 @@ class SourceFeedback:
         if not (1 <= self.rating <= 5):
             raise ValueError("rating must be between 1 and 5")
 
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> 'SourceFeedback':
+        """Build from a database row without re-running validation.
+
+        The schema's CHECK constraint already guarantees the range.
+        """
+        feedback = object.__new__(cls)
+        feedback.__dict__.update(dict(row))
+        return feedback
+
+    @classmethod
+    def get_for_message(cls, message_id: int) -> List['SourceFeedback']:
+        """Get all source ratings left on a message's sources"""
+        with get_db().get_cursor() as cursor:
+            cursor.execute('''
+                SELECT sf.id, sf.message_source_id, sf.rating, sf.created_at
+                FROM source_feedback sf
+                JOIN message_sources ms ON ms.id = sf.message_source_id
+                WHERE ms.message_id = ?
+            ''', (message_id,))
+            return [cls.from_row(row) for row in cursor]
+
     def save(self) -> None:
         """Save source feedback to database"""
-        with st.session_state.database.get_cursor() as cursor:
+        with get_db().get_cursor() as cursor:
             if self.id:
                 cursor.execute('''
                     UPDATE source_feedback SET 
@@ -28,5 +51,25 @@ class SourceFeedback:
                     INSERT INTO source_feedback (
                         message_source_id, rating, created_at
                     ) VALUES (?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT (message_source_id) DO UPDATE SET
+                        rating = excluded.rating,
+                        created_at = excluded.created_at
+                    RETURNING id
                 ''', (self.message_source_id, self.rating))
-                self.id = cursor.lastrowid
\ No newline at end of file
+                self.id = cursor.fetchone()[0]
+
+    @classmethod
+    def bulk_insert(cls, feedback: List['SourceFeedback']) -> None:
+        """Save many source ratings in a single transaction"""
+        if not feedback:
+            return
+        with get_db().get_cursor() as cursor:
+            # One rating per source: resubmitting replaces it
+            cursor.executemany('''
+                INSERT INTO source_feedback (
+                    message_source_id, rating, created_at
+                ) VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (message_source_id) DO UPDATE SET
+                    rating = excluded.rating,
+                    created_at = excluded.created_at
+            ''', [(item.message_source_id, item.rating) for item in feedback])
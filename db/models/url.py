@@ -1,28 +1,30 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from datetime import datetime
 from typing import Optional, List
 import streamlit as st
 import sqlite3
+from ..connection import get_data_version, get_db
 
-@dataclass
+@dataclass(slots=True)
 class URL():
     url: str
     description: str
-    added_date: datetime
+    added_date: str
     id: Optional[int] = None
-    last_scraped: Optional[datetime] = None
+    last_scraped: Optional[str] = None
 
     @classmethod
     def add(cls, url: str, description: str) -> Optional[URL]:
         """Add a new URL to the database"""
         try:
-            with st.session_state.database.get_cursor() as cursor:
-                cursor.execute(
-                    'INSERT INTO urls (url, description, added_date) VALUES (?, ?, ?)',
-                    (url, description, datetime.now())
-                )
-                return cls(url=url, description=description, added_date=datetime.now(), id=cursor.lastrowid)
+            with get_db().get_cursor() as cursor:
+                cursor.execute('''
+                    INSERT INTO urls (url, description, added_date)
+                    VALUES (?, ?, datetime('now'))
+                    RETURNING id, added_date
+                ''', (url, description))
+                url_id, added_date = cursor.fetchone()
+                return cls(url=url, description=description, added_date=added_date, id=url_id)
         except sqlite3.IntegrityError:
             st.error("This URL already exists in the database!")
             return None
@@ -30,7 +32,12 @@ class URL():
     @classmethod
     def get_all(cls) -> List[URL]:
         """Retrieve all URLs from the database"""
-        with st.session_state.database.get_cursor() as cursor:
+        return _load_urls(get_data_version())
+
+    @classmethod
+    def _fetch_all(cls) -> List[URL]:
+        """Query all URLs, bypassing the cache"""
+        with get_db().get_cursor() as cursor:
             cursor.execute('''
                 SELECT id, url, description, added_date, last_scraped 
                 FROM urls 
@@ -47,19 +54,31 @@ class URL():
                 for row in cursor.fetchall()
             ]
 
-    def delete(self) -> None:
-        """Delete URL from database"""
+    def delete(self) -> bool:
+        """Delete URL and, through cascading foreign keys, its sections.
+
+        Returns whether a row was deleted.
+        """
         if not self.id:
             raise ValueError("Cannot delete URL without ID")
-        with st.session_state.database.get_cursor() as cursor:
-            cursor.execute('DELETE FROM urls WHERE id = ?', (self.id,))
+        with get_db().get_cursor() as cursor:
+            cursor.execute('DELETE FROM urls WHERE id = ? RETURNING id', (self.id,))
+            return cursor.fetchone() is not None
 
     def update_last_scraped(self) -> None:
         """Update last_scraped timestamp"""
         if not self.id:
             raise ValueError("Cannot update URL without ID")
-        with st.session_state.database.get_cursor() as cursor:
+        with get_db().get_cursor() as cursor:
             cursor.execute(
-                'UPDATE urls SET last_scraped = ? WHERE id = ?',
-                (datetime.now(), self.id)
-            )
\ No newline at end of file
+                "UPDATE urls SET last_scraped = datetime('now') WHERE id = ? RETURNING last_scraped",
+                (self.id,)
+            )
+            row = cursor.fetchone()
+            if row:
+                self.last_scraped = row[0]
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _load_urls(version: int) -> List[URL]:
+    """Cached URL list; a new data version forces a reload"""
+    return URL._fetch_all()
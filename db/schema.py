@@ -28,6 +28,8 @@ CREATE_TABLES_SQL = {
             level INTEGER,
             url_fragment TEXT,
             section_order INTEGER,
+            depth INTEGER DEFAULT 0,
+            path TEXT,
             FOREIGN KEY (url_id) REFERENCES urls (id) ON DELETE CASCADE,
             FOREIGN KEY (parent_id) REFERENCES sections (id) ON DELETE CASCADE
         )
@@ -38,7 +40,10 @@ CREATE_TABLES_SQL = {
             title TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            metadata TEXT
+            metadata TEXT,
+            last_message_at TIMESTAMP,
+            last_message_preview TEXT,
+            message_count INTEGER DEFAULT 0
         )
     ''',
     'messages': '''
@@ -84,5 +89,135 @@ CREATE_TABLES_SQL = {
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (message_source_id) REFERENCES message_sources(id) ON DELETE CASCADE
         )
+    ''',
+    'idx_conversations_updated': '''
+        CREATE INDEX IF NOT EXISTS idx_conversations_updated
+        ON conversations (updated_at DESC)
+    ''',
+    'idx_messages_conv': '''
+        CREATE INDEX IF NOT EXISTS idx_messages_conv
+        ON messages (conversation_id, message_order)
+    ''',
+    # Keeps the denormalized conversation list columns current. The preview
+    # is stored truncated for display, and a conversation's first question
+    # becomes its title unless one was set.
+    'trg_messages_conv_summary': '''
+        CREATE TRIGGER IF NOT EXISTS trg_messages_conv_summary
+        AFTER INSERT ON messages
+        BEGIN
+            UPDATE conversations SET
+                updated_at = CURRENT_TIMESTAMP,
+                last_message_at = NEW.created_at,
+                last_message_preview =
+                    substr(NEW.content, 1, 50)
+                    || CASE WHEN length(NEW.content) > 50 THEN '...' ELSE '' END,
+                message_count = message_count + 1,
+                title = CASE
+                    WHEN NEW.role = 'user' AND NEW.message_order = 0
+                    THEN COALESCE(
+                        title,
+                        substr(NEW.content, 1, 50)
+                        || CASE WHEN length(NEW.content) > 50 THEN '...' ELSE '' END
+                    )
+                    ELSE title
+                END
+            WHERE id = NEW.conversation_id;
+        END
+    ''',
+    'idx_msg_sources_msg': '''
+        CREATE INDEX IF NOT EXISTS idx_msg_sources_msg
+        ON message_sources (message_id)
+    ''',
+    # A message has at most one feedback row and a source at most one
+    # rating; resubmitted feedback is upserted against these
+    'idx_mf_msg': '''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_mf_msg
+        ON message_feedback (message_id)
+    ''',
+    'idx_sf_ms': '''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_sf_ms
+        ON source_feedback (message_source_id)
+    ''',
+    'idx_sections_url': '''
+        CREATE INDEX IF NOT EXISTS idx_sections_url
+        ON sections (url_id, section_order)
+    ''',
+    'idx_sections_parent': '''
+        CREATE INDEX IF NOT EXISTS idx_sections_parent
+        ON sections (parent_id)
+    ''',
+    'idx_content_url': '''
+        CREATE INDEX IF NOT EXISTS idx_content_url
+        ON content (url_id)
+    '''
+}
+
+# Columns added after a table was first created. init_db adds any that an
+# existing database is missing and then runs the table's backfill, if any.
+ADDED_COLUMNS = {
+    'sections': {
+        'depth': 'INTEGER DEFAULT 0',
+        'path': 'TEXT'
+    },
+    'conversations': {
+        'last_message_at': 'TIMESTAMP',
+        'last_message_preview': 'TEXT',
+        'message_count': 'INTEGER DEFAULT 0'
+    }
+}
+
+BACKFILL_SQL = {
+    'sections': '''
+        WITH RECURSIVE section_tree AS (
+            SELECT id, 0 AS depth, title AS path
+            FROM sections
+            WHERE parent_id IS NULL
+
+            UNION ALL
+
+            SELECT s.id, st.depth + 1, st.path || ' > ' || s.title
+            FROM sections s
+            JOIN section_tree st ON s.parent_id = st.id
+        )
+        UPDATE sections SET
+            depth = COALESCE((SELECT depth FROM section_tree WHERE id = sections.id), 0),
+            path = COALESCE((SELECT path FROM section_tree WHERE id = sections.id), title)
+    ''',
+    'conversations': '''
+        UPDATE conversations SET
+            last_message_at = (
+                SELECT MAX(m.created_at) FROM messages m
+                WHERE m.conversation_id = conversations.id
+            ),
+            last_message_preview = (
+                SELECT
+                    substr(m.content, 1, 50)
+                    || CASE WHEN length(m.content) > 50 THEN '...' ELSE '' END
+                FROM messages m
+                WHERE m.conversation_id = conversations.id
+                ORDER BY m.created_at DESC, m.id DESC
+                LIMIT 1
+            ),
+            message_count = (
+                SELECT COUNT(*) FROM messages m
+                WHERE m.conversation_id = conversations.id
+            )
+    '''
+}
+
+# Run once, just before a unique index is first built, to remove the
+# duplicates older databases may hold; only the newest row is kept
+DEDUPE_SQL = {
+    'idx_mf_msg': '''
+        DELETE FROM message_feedback
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM message_feedback GROUP BY message_id
+        )
+    ''',
+    'idx_sf_ms': '''
+        DELETE FROM source_feedback
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM source_feedback GROUP BY message_source_id
+        )
     '''
-}
\ No newline at end of file
+}
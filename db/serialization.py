@@ -0,0 +1,6 @@
+# orjson decodes considerably faster than the standard library but is an
+# optional dependency
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
@@ -1,8 +1,10 @@
 import streamlit as st
-from utils.vector_store import VectorStore
+from utils.vector_store import get_vector_store
 from utils.text_processing import prepare_sections_for_indexing
 from db.models.url import URL
 from db.models.section import Section
+from utils.async_utils import run_in_background
+from utils.scraper import DocumentScraper
 
 st.set_page_config(
     page_title="Settings - AWS Documentation RAG",
@@ -10,38 +12,70 @@ st.set_page_config(
     layout="wide"
 )
 
+# How each content warning level is shown, most severe first
+WARNING_RENDERERS = {
+    'high': st.warning,
+    'medium': st.warning,
+    'low': st.info
+}
+
 def display_sections(sections: list[Section], base_url: str):
     """Display hierarchical content with expandable sections"""
     if not sections:
         st.write("No content available")
         return
 
-    # Create a more readable display format
-    section_display = []
-    for section in sections:
-        section_display.append({
-            'Title': section.title,
-            'Level': section.level,
-            'URL': f"{base_url}#{section.url_fragment}" if section.url_fragment else base_url,
-            'Content Length': len(section.content) if section.content else 0,
-            'Path': section.path or section.title
-        })
+    # Build the table column by column rather than as one dict per row
+    section_display = {
+        'Title': [section.title for section in sections],
+        'Level': [section.level for section in sections],
+        'URL': [
+            f"{base_url}#{section.url_fragment}" if section.url_fragment else base_url
+            for section in sections
+        ],
+        'Content Length': [len(section.content) if section.content else 0 for section in sections],
+        'Path': [section.path or section.title for section in sections]
+    }
     
     # Display as a table
     st.table(section_display)
 
+def store_scraped_content(url: URL, sections: list[Section], warnings: list, vector_store) -> bool:
+    """Record a scrape's warnings, save its sections and index them; returns whether indexing succeeded"""
+    if warnings:
+        if 'content_warnings' not in st.session_state:
+            st.session_state.content_warnings = []
+        st.session_state.content_warnings.extend(warnings)
+    
+    # Save all sections in one transaction; ids and parent ids are
+    # filled in on the same objects
+    saved_sections = Section.bulk_save(sections, url.id)
+    
+    # Update URL last_scraped timestamp
+    url.update_last_scraped()
+    
+    # Process sections for vector store
+    documents = prepare_sections_for_indexing(saved_sections, url.url)
+    
+    # Add to vector store
+    return vector_store.add_section_chunks(documents, url.id)
+
 def settings_page():
     st.title("RAG Settings")
 
+    # Only this page scrapes, so it owns the scraper
+    if 'scraper' not in st.session_state:
+        st.session_state.scraper = DocumentScraper()
+
     if 'content_warnings' in st.session_state and st.session_state.content_warnings:
         with st.expander("⚠️ Content Size Warnings", expanded=True):
+            # One element per level rather than one per warning
+            messages_by_level = {}
             for warning in st.session_state.content_warnings:
-                if warning.level == 'high':
-                    st.warning(warning.message)
-                elif warning.level == 'medium':
-                    st.warning(warning.message)
-                elif warning.level == 'low':
-                    st.info(warning.message)
+                messages_by_level.setdefault(warning.level, []).append(warning.message)
+            for level, render in WARNING_RENDERERS.items():
+                if level in messages_by_level:
+                    render("\n".join(f"- {message}" for message in messages_by_level[level]))
             
             if st.button("Clear Warnings"):
                 st.session_state.content_warnings = []
@@ -71,79 +105,91 @@ def settings_page():
         st.info("No URLs have been added yet.")
     else:
         # Initialize vector store
-        vector_store = VectorStore()
+        vector_store = get_vector_store()
         
-        for url in urls:
-            with st.expander(f"{url.description or url.url}"):
-                st.write(f"**URL:** {url.url}")
-                st.write(f"**Added:** {url.added_date}")
-                
-                # Display hierarchical content
+        if st.button("Scrape all URLs", key="scrape_all"):
+            with st.spinner(f"Scraping {len(urls)} URLs..."):
+                # Pages are fetched concurrently over one HTTP session; a
+                # URL that failed comes back as None
+                results = run_in_background(
+                    st.session_state.scraper.scrape_urls_async([url.url for url in urls])
+                ).result()
+                failed = []
+                for url, result in zip(urls, results):
+                    if result is None:
+                        failed.append(url.url)
+                        continue
+                    title, sections, warnings = result
+                    try:
+                        if not store_scraped_content(url, sections, warnings, vector_store):
+                            failed.append(url.url)
+                    except Exception:
+                        failed.append(url.url)
+            if failed:
+                st.error("Error scraping:\n" + "\n".join(f"- {failed_url}" for failed_url in failed))
+            else:
+                st.success("All URLs scraped and indexed successfully!")
+                st.rerun()
+        
+        # One table for all URLs; the actions below apply to the selected row
+        selection = st.dataframe(
+            {
+                'Description': [url.description or '' for url in urls],
+                'URL': [url.url for url in urls],
+                'Added': [url.added_date for url in urls],
+                'Last scraped': [url.last_scraped or 'Not yet scraped' for url in urls]
+            },
+            column_config={'URL': st.column_config.LinkColumn('URL')},
+            hide_index=True,
+            use_container_width=True,
+            on_select="rerun",
+            selection_mode="single-row",
+            key="url_table"
+        )
+        
+        # The stored selection can outlive a deleted row
+        selected_rows = [row for row in selection.selection.rows if row < len(urls)]
+        if not selected_rows:
+            st.caption("Select a URL to scrape it, delete it or view its structure.")
+            return
+        url = urls[selected_rows[0]]
+        
+        st.subheader(url.description or url.url)
+        
+        # Display hierarchical content
+        if url.last_scraped:
+            # Sections are only loaded once the user asks to see them
+            if st.toggle("Show document structure", key=f"open_{url.id}"):
+                st.write("**Document Structure:**")
+                display_sections(Section.get_by_url(url.id), url.url)
+        
+        # Scrape and Delete buttons
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button(f"Scrape", key="scrape_url"):
+                with st.spinner(f"Scraping {url.url}..."):
+                    try:    
+                        # Scrape on the shared background loop; warnings come
+                        # back here since only this thread may touch the page
+                        title, sections, warnings = run_in_background(
+                            st.session_state.scraper.scrape_url_async(url.url)
+                        ).result()
+                        if store_scraped_content(url, sections, warnings, vector_store):
+                            st.success("Content scraped and indexed successfully!")
+                            st.rerun()
+                        else:
+                            st.error("Error adding content to vector store")
+                    except Exception as e:
+                        st.error(f"Error during scraping process: {str(e)}")
+        
+        with col2:
+            if st.button(f"Delete", key="delete_url"):
+                # Delete URL; its sections go with it via ON DELETE CASCADE
+                url.delete()
+                # Remove from vector store; a URL never scraped has no chunks
                 if url.last_scraped:
-                    st.write(f"**Last scraped:** {url.last_scraped}")
-                    st.write("**Document Structure:**")
-                    sections = Section.get_by_url(url.id)
-                    display_sections(sections, url.url)
-                else:
-                    st.write("**Status:** Not yet scraped")
-                
-                # Scrape and Delete buttons
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.button(f"Scrape", key=f"scrape_{url.id}"):
-                        with st.spinner(f"Scraping {url.url}..."):
-                            try:    
-                                result = st.session_state.scraper.scrape_url(url.url)
-                                if result is None:
-                                    st.error("Error during scraping process")
-                                    return
-
-                                title, sections = result
-                                
-                                # Save each section
-                                for i, section in enumerate(sections):
-                                    section.url_id = url.id
-                                    section.section_order = i
-                                    section.save()
-                                
-                                # Update URL last_scraped timestamp
-                                url.update_last_scraped()
-                                
-                                # Get all saved sections
-                                saved_sections = Section.get_by_url(url.id)
-                                
-                                # Convert sections to dictionary format for vector store
-                                # (since vector store expects dicts)
-                                section_dicts = [{
-                                    'id': section.id,
-                                    'title': section.title,
-                                    'content': section.content,
-                                    'level': section.level,
-                                    'url_fragment': section.url_fragment,
-                                    'path': section.path
-                                } for section in saved_sections]
-                                
-                                # Process sections for vector store
-                                documents = prepare_sections_for_indexing(section_dicts, url.url)
-                                
-                                # Add to vector store
-                                if vector_store.add_section_chunks(documents, url.id):
-                                    st.success("Content scraped and indexed successfully!")
-                                    st.rerun()
-                                else:
-                                    st.error("Error adding content to vector store")
-                            except Exception as e:
-                                st.error(f"Error during scraping process: {str(e)}")
-                
-                with col2:
-                    if st.button(f"Delete", key=f"del_{url.id}"):
-                        # Delete sections first
-                        Section.delete_by_url(url.id)
-                        # Delete URL
-                        url.delete()
-                        # Remove from vector store
-                        vector_store.delete_url_content(url.id)
-                        st.rerun()
+                    vector_store.delete_url_content(url.id)
+                st.rerun()
 
 if __name__ == "__main__":
     settings_page()
\ No newline at end of file
@@ -1,5 +1,7 @@
 import streamlit as st
 import pandas as pd
+from collections import Counter
+from typing import List, Optional
 from utils.logger import Logger
 
 st.set_page_config(
@@ -21,14 +23,26 @@ def display_log_stats(logs):
         st.metric("Total Logs", len(logs))
     
     # Count by level
-    level_counts = pd.DataFrame(logs)['level'].value_counts()
+    level_counts = Counter(log['level'] for log in logs)
     
     with col2:
-        st.metric("Errors", level_counts.get('ERROR', 0))
+        st.metric("Errors", level_counts['ERROR'])
     with col3:
-        st.metric("Warnings", level_counts.get('WARNING', 0))
+        st.metric("Warnings", level_counts['WARNING'])
     with col4:
-        st.metric("Info", level_counts.get('INFO', 0))
+        st.metric("Info", level_counts['INFO'])
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_logs(log_mtime_ns: int, n_lines: int, level_filter: Optional[str]) -> List[dict]:
+    """Parsed log tail; a change to the file's mtime forces a reload"""
+    return Logger().get_log_contents(n_lines=n_lines, level_filter=level_filter)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def logs_to_csv(log_mtime_ns: int, n_lines: int, level_filter: Optional[str]) -> bytes:
+    """CSV export of the same log tail, encoded once per log change"""
+    logs = load_logs(log_mtime_ns, n_lines, level_filter)
+    df = pd.DataFrame(logs, columns=['timestamp', 'level', 'message'])
+    return df.to_csv(index=False, lineterminator='\n').encode('utf-8')
 
 def logs_page():
     st.title("📋 Application Logs")
@@ -61,10 +75,9 @@ def logs_page():
                 st.rerun()
     
     # Get logs with filters
-    logs = logger.get_log_contents(
-        n_lines=n_lines,
-        level_filter=None if level_filter == "All" else level_filter
-    )
+    log_mtime_ns = logger.log_file.stat().st_mtime_ns if logger.log_file.exists() else 0
+    level = None if level_filter == "All" else level_filter
+    logs = load_logs(log_mtime_ns, n_lines, level)
     
     # Display stats
     display_log_stats(logs)
@@ -74,7 +87,10 @@ def logs_page():
         st.header("Log Entries")
         
         # Convert to dataframe for display
-        df = pd.DataFrame(logs)
+        df = pd.DataFrame(logs, columns=['timestamp', 'level', 'message'])
+        # Native datetimes travel to the browser as a compact Arrow
+        # timestamp column and suit the DatetimeColumn config below
+        df['timestamp'] = pd.to_datetime(df['timestamp'], format='%Y-%m-%d %H:%M:%S', errors='coerce')
         
         # Apply custom styling
         def style_log_level(val):
@@ -98,15 +114,13 @@ def logs_page():
         )
         
         # Export option
-        if st.button("Export Logs to CSV"):
-            csv = df.to_csv(index=False)
-            st.download_button(
-                "Download CSV",
-                csv,
-                "logs.csv",
-                "text/csv",
-                key='download-csv'
-            )
+        st.download_button(
+            "Export Logs to CSV",
+            logs_to_csv(log_mtime_ns, n_lines, level),
+            "logs.csv",
+            "text/csv",
+            key='download-csv'
+        )
     else:
         st.info("No logs found matching the current filters.")
 
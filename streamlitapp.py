@@ -1,50 +1,42 @@
-import streamlit as st
-from typing import Dict, List, Optional
 import asyncio
-from datetime import datetime
-from utils.vector_store import VectorStore
-from utils.rag import RAGPipeline
+import queue
+import streamlit as st
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
 from utils.logger import Logger
-from db.models.conversation import Conversation
+from db.models.conversation import Conversation, ConvSummary
 from db.models.message import Message
 from db.models.message_source import MessageSource
 from db.models.message_feedback import MessageFeedback
 from db.models.source_feedback import SourceFeedback
-from db.connection import get_db
-from utils.scraper import DocumentScraper
+from db.connection import get_data_version, get_db
+from utils.async_utils import run_in_background
+
+if TYPE_CHECKING:
+    from utils.rag import ChatState, RAGPipeline
 
 def initialize_components():
     """Initialize all necessary components"""
     # Initialize database instance
     get_db()
     
-    # Initialize other components
-    if 'vector_store' not in st.session_state:
-        st.session_state.vector_store = VectorStore()
-    
-    if 'rag_pipeline' not in st.session_state:
-        st.session_state.rag_pipeline = RAGPipeline(st.session_state.vector_store)
-        
     if 'processing' not in st.session_state:
         st.session_state.processing = False
-        
-    if 'scraper' not in st.session_state:
-        st.session_state.scraper = DocumentScraper()
 
-def get_or_create_eventloop():
-    """Get the current event loop or create a new one"""
-    if 'event_loop' not in st.session_state:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        st.session_state.event_loop = loop
-    return st.session_state.event_loop
+# Number of conversations listed per sidebar page
+CONVERSATIONS_PAGE_SIZE = 20
 
 class ChatInterface:
     def __init__(self):
         self.logger = Logger()
         
-        # Load available conversations
-        self.conversations = Conversation.get_all()
+        # Filled by refresh(); the key records what the list was loaded for
+        self.conversations = []
+        self._conv_by_id = {}
+        self.has_older_conversations = False
+        self._conversations_key = None
+        
+        if 'conversation_page' not in st.session_state:
+            st.session_state.conversation_page = 0
         
         # Initialize conversation state
         if 'current_conversation_id' not in st.session_state:
@@ -54,10 +46,43 @@ class ChatInterface:
         if 'feedback_states' not in st.session_state:
             st.session_state.feedback_states = {}
 
+        # Next message_order per conversation, seeded from the database once
+        if 'next_order_by_conv' not in st.session_state:
+            st.session_state.next_order_by_conv = {}
+
+    def refresh(self):
+        """Reload the conversation list if the data or sidebar page changed"""
+        page = st.session_state.conversation_page
+        key = (get_data_version(), page)
+        if key == self._conversations_key:
+            return
+        
+        # Load only the current page; one extra row tells us whether
+        # older conversations exist
+        conversations = Conversation.list_summaries(
+            limit=CONVERSATIONS_PAGE_SIZE + 1,
+            offset=page * CONVERSATIONS_PAGE_SIZE
+        )
+        if not conversations and page > 0:
+            # Deletes emptied this page; step back to the last one with rows
+            st.session_state.conversation_page -= 1
+            return self.refresh()
+        self.has_older_conversations = len(conversations) > CONVERSATIONS_PAGE_SIZE
+        self.conversations = conversations[:CONVERSATIONS_PAGE_SIZE]
+        self._conv_by_id = {conv.id: conv for conv in self.conversations}
+        self._conversations_key = key
+
+    def current_conversation(self) -> Optional[ConvSummary]:
+        """Summary of the open conversation, even when paged out of the sidebar"""
+        current_id = st.session_state.current_conversation_id
+        return self._conv_by_id.get(current_id) or Conversation.get_summary(current_id)
+
     def _initialize_active_conversation(self):
         """Set the active conversation"""
-        if self.conversations:
-            st.session_state.current_conversation_id = self.conversations[0].id
+        # Query rather than use self.conversations, which is stale after a delete
+        latest_id = Conversation.get_latest_id()
+        if latest_id is not None:
+            st.session_state.current_conversation_id = latest_id
         else:
             # Create new conversation if none exists
             new_conv = Conversation.create()
@@ -72,37 +97,59 @@ class ChatInterface:
             if st.button("New Conversation", type="secondary"):
                 new_conv = Conversation.create()
                 st.session_state.current_conversation_id = new_conv.id
+                st.session_state.next_order_by_conv[new_conv.id] = 0
+                st.session_state.conversation_page = 0
                 st.rerun()
             
             st.divider()
             
-            # List existing conversations
-            for conv in self.conversations:
-                col1, col2 = st.columns([4, 1])
+            # List existing conversations as one radio group rather than a
+            # column pair and two buttons per row; delete acts on the selection
+            if self.conversations:
+                current_id = st.session_state.current_conversation_id
+                # Keep the open conversation selectable, and selected, on
+                # pages it doesn't fall on
+                listed = self.conversations
+                current_conv = self.current_conversation()
+                if current_conv and current_id not in self._conv_by_id:
+                    listed = [current_conv] + listed
+                conv_by_id = {conv.id: conv for conv in listed}
+                ids = list(conv_by_id)
+                selected_id = st.radio(
+                    "Conversations",
+                    ids,
+                    index=ids.index(current_id) if current_id in conv_by_id else None,
+                    format_func=lambda conv_id: conv_by_id[conv_id].title,
+                    captions=[
+                        f"{conv.updated_display} · {conv.preview or 'New Conversation'}"
+                        for conv in listed
+                    ],
+                    label_visibility="collapsed"
+                )
+                if selected_id is not None and selected_id != current_id:
+                    # Reseed the order counter in case another session wrote to it
+                    st.session_state.next_order_by_conv.pop(selected_id, None)
+                    st.session_state.current_conversation_id = selected_id
+                    st.rerun()
+                
+                # Delete the selected conversation
+                if current_id in conv_by_id and st.button("🗑️ Delete conversation", type="secondary"):
+                    Conversation(id=current_id).delete()
+                    st.session_state.next_order_by_conv.pop(current_id, None)
+                    self._initialize_active_conversation()
+                    st.rerun()
+
+            # Page navigation
+            page = st.session_state.conversation_page
+            if page > 0 or self.has_older_conversations:
+                col1, col2 = st.columns(2)
                 with col1:
-                    preview = getattr(conv, 'preview', '') or 'New Conversation'
-                    button_text = (
-                        f"{conv.title or 'New Conversation'}\n"
-                        f"{datetime.fromisoformat(str(conv.updated_at)).strftime('%Y-%m-%d %H:%M')}\n"
-                        f"{preview}"
-                    )
-                    
-                    if st.button(
-                        button_text,
-                        key=f"conv_{conv.id}",
-                        type="secondary" if conv.id == st.session_state.current_conversation_id else "tertiary",
-                        use_container_width=True
-                    ):
-                        st.session_state.current_conversation_id = conv.id
+                    if st.button("Newer", type="secondary", disabled=page == 0):
+                        st.session_state.conversation_page -= 1
                         st.rerun()
-                
-                # Delete conversation button
                 with col2:
-                    if st.button("🗑️", key=f"del_{conv.id}", type="secondary"):
-                        conv_obj = Conversation(id=conv.id)
-                        conv_obj.delete()
-                        if conv.id == st.session_state.current_conversation_id:
-                            self._initialize_active_conversation()
+                    if st.button("Older", type="secondary", disabled=not self.has_older_conversations):
+                        st.session_state.conversation_page += 1
                         st.rerun()
 
     def display_chat_history(self):
@@ -110,10 +157,7 @@ class ChatInterface:
         messages = Message.get_conversation_messages(st.session_state.current_conversation_id)
         
         # Display conversation title if it exists
-        current_conv = next(
-            (c for c in self.conversations if c.id == st.session_state.current_conversation_id), 
-            None
-        )
+        current_conv = self.current_conversation()
         if current_conv and current_conv.title:
             st.caption(f"Current conversation: {current_conv.title}")
         
@@ -123,170 +167,239 @@ class ChatInterface:
                     st.write(msg.content)
             
             elif msg.role == "assistant":
-                with st.chat_message("assistant"):
-                    st.write(msg.content)
-                    
-                    # Check for existing feedback
-                    has_feedback = msg.has_feedback()
-                    
-                    # Initialize or update feedback state for this message
-                    if msg.id not in st.session_state.feedback_states:
-                        if has_feedback:
-                            # Load existing feedback
-                            existing_feedback = msg.get_feedback()
-                            existing_source_feedback = msg.get_source_feedback()
-                            st.session_state.feedback_states[msg.id] = {
-                                'show_feedback': False,
-                                'has_feedback': True,
-                                'relevance': existing_feedback['relevance'],
-                                'accuracy': existing_feedback['accuracy'],
-                                'feedback_text': existing_feedback['feedback_text'],
-                                'source_ratings': existing_source_feedback
-                            }
-                        else:
-                            st.session_state.feedback_states[msg.id] = {
-                                'show_feedback': False,
-                                'has_feedback': False,
-                                'relevance': 3,
-                                'accuracy': 3,
-                                'feedback_text': '',
-                                'source_ratings': {}
-                            }
-                    
-                    # Feedback button or status
-                    col1, col2 = st.columns([6, 1])
+                self._display_assistant_message(msg)
+
+    @staticmethod
+    def _initial_feedback_state(msg: Message) -> Dict:
+        """Feedback form state for a message, prefilled from saved feedback"""
+        if msg.has_feedback():
+            existing_feedback = msg.get_feedback()
+            return {
+                'show_feedback': False,
+                'has_feedback': True,
+                'relevance': existing_feedback['relevance'],
+                'accuracy': existing_feedback['accuracy'],
+                'feedback_text': existing_feedback['feedback_text'],
+                'source_ratings': msg.get_source_feedback()
+            }
+        return {
+            'show_feedback': False,
+            'has_feedback': False,
+            'relevance': 3,
+            'accuracy': 3,
+            'feedback_text': '',
+            'source_ratings': {}
+        }
+
+    @st.fragment
+    def _display_assistant_message(self, msg: Message):
+        """Display an assistant message with its feedback controls.
+
+        Runs as a fragment so rating widgets rerun only this message,
+        not the whole chat history.
+        """
+        with st.chat_message("assistant"):
+            st.write(msg.content)
+            
+            # Feedback state is built once per message and session
+            feedback_state = st.session_state.feedback_states.get(msg.id)
+            if feedback_state is None:
+                feedback_state = self._initial_feedback_state(msg)
+                st.session_state.feedback_states[msg.id] = feedback_state
+            
+            # Feedback button or status
+            col1, col2 = st.columns([6, 1])
+            with col2:
+                if not feedback_state['has_feedback']:
+                    if st.button("Rate Answer", key=f"fb_{msg.id}"):
+                        feedback_state['show_feedback'] = True
+                else:
+                    st.write("✓ Rated")
+            
+            # Show feedback form if button was clicked
+            if feedback_state['show_feedback']:
+                with st.expander("Provide Feedback", expanded=True):
+                    # Message feedback
+                    st.write("Rate the answer:")
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        relevance = st.slider(
+                            "Relevance",
+                            1, 5, 
+                            feedback_state['relevance'],
+                            key=f"rel_{msg.id}"
+                        )
                     with col2:
-                        if not st.session_state.feedback_states[msg.id]['has_feedback']:
-                            if st.button("Rate Answer", key=f"fb_{msg.id}"):
-                                st.session_state.feedback_states[msg.id]['show_feedback'] = True
-                        else:
-                            st.write("✓ Rated")
+                        accuracy = st.slider(
+                            "Accuracy",
+                            1, 5,
+                            feedback_state['accuracy'],
+                            key=f"acc_{msg.id}"
+                        )
                     
-                    # Show feedback form if button was clicked
-                    if st.session_state.feedback_states[msg.id]['show_feedback']:
-                        with st.expander("Provide Feedback", expanded=True):
-                            # Message feedback
-                            st.write("Rate the answer:")
-                            col1, col2 = st.columns(2)
-                            with col1:
-                                relevance = st.slider(
-                                    "Relevance",
-                                    1, 5, 
-                                    st.session_state.feedback_states[msg.id]['relevance'],
-                                    key=f"rel_{msg.id}"
-                                )
-                            with col2:
-                                accuracy = st.slider(
-                                    "Accuracy",
-                                    1, 5,
-                                    st.session_state.feedback_states[msg.id]['accuracy'],
-                                    key=f"acc_{msg.id}"
+                    feedback_text = st.text_area(
+                        "Additional feedback (optional):",
+                        value=feedback_state['feedback_text'],
+                        key=f"txt_{msg.id}"
+                    )
+                    
+                    if st.button("Submit Feedback", key=f"submit_{msg.id}"):
+                        try:
+                            # Save the answer and source ratings in one transaction
+                            with get_db().get_cursor():
+                                message_feedback = MessageFeedback(
+                                    message_id=msg.id,
+                                    answer_relevance=relevance,
+                                    answer_accuracy=accuracy,
+                                    feedback_text=feedback_text
                                 )
+                                message_feedback.save()
+                                
+                                SourceFeedback.bulk_insert([
+                                    SourceFeedback(message_source_id=source_id, rating=rating)
+                                    for source_id, rating in feedback_state['source_ratings'].items()
+                                ])
                             
-                            feedback_text = st.text_area(
-                                "Additional feedback (optional):",
-                                value=st.session_state.feedback_states[msg.id]['feedback_text'],
-                                key=f"txt_{msg.id}"
-                            )
+                            st.success("Thank you for your feedback!")
+                            feedback_state['show_feedback'] = False
+                            feedback_state['has_feedback'] = True
                             
-                            if st.button("Submit Feedback", key=f"submit_{msg.id}"):
-                                try:
-                                    # Save message feedback
-                                    message_feedback = MessageFeedback(
-                                        message_id=msg.id,
-                                        answer_relevance=relevance,
-                                        answer_accuracy=accuracy,
-                                        feedback_text=feedback_text
-                                    )
-                                    message_feedback.save()
-                                    
-                                    # Save source feedback
-                                    for source_id, rating in st.session_state.feedback_states[msg.id]['source_ratings'].items():
-                                        source_feedback = SourceFeedback(
-                                            message_source_id=source_id,
-                                            rating=rating
-                                        )
-                                        source_feedback.save()
-                                    
-                                    st.success("Thank you for your feedback!")
-                                    st.session_state.feedback_states[msg.id]['show_feedback'] = False
-                                    st.session_state.feedback_states[msg.id]['has_feedback'] = True
-                                    
-                                except Exception as e:
-                                    self.logger.error(f"Error saving feedback: {str(e)}")
-                                    st.error("Error saving feedback. Please try again.")
+                        except Exception as e:
+                            self.logger.error(f"Error saving feedback: {str(e)}")
+                            st.error("Error saving feedback. Please try again.")
+            
+            # Display sources with feedback options
+            if msg.sources:
+                with st.expander("View Sources"):
+                    st.markdown(msg.sources_markdown())
                     
-                    # Display sources with feedback options
-                    if msg.sources:
-                        with st.expander("View Sources"):
-                            st.markdown(self._format_sources(msg.sources))
-                            
-                            # Source feedback if feedback form is shown
-                            if st.session_state.feedback_states[msg.id]['show_feedback']:
-                                st.write("Rate the relevance of each source:")
-                                for source in msg.sources:
-                                    if source.id not in st.session_state.feedback_states[msg.id]['source_ratings']:
-                                        st.session_state.feedback_states[msg.id]['source_ratings'][source.id] = 3
-                                    
-                                    source_rating = st.slider(
-                                        f"Source: {source.title}",
-                                        1, 5,
-                                        st.session_state.feedback_states[msg.id]['source_ratings'][source.id],
-                                        key=f"src_{msg.id}_{source.id}"
-                                    )
-                                    st.session_state.feedback_states[msg.id]['source_ratings'][source.id] = source_rating
-                            
-                            if msg.confidence is not None:
-                                st.progress(msg.confidence)
-                                st.caption(f"Confidence Score: {msg.confidence}")
+                    # Source feedback if feedback form is shown
+                    if feedback_state['show_feedback']:
+                        st.write("Rate the relevance of each source:")
+                        source_ratings = feedback_state['source_ratings']
+                        for source in msg.sources:
+                            source_ratings[source.id] = st.slider(
+                                f"Source: {source.title}",
+                                1, 5,
+                                source_ratings.get(source.id, 3),
+                                key=f"src_{msg.id}_{source.id}"
+                            )
+                    
+                    if msg.confidence is not None:
+                        st.progress(msg.confidence)
+                        st.caption(f"Confidence Score: {msg.confidence}")
 
-    async def process_question(self, question: str):
-        """Process user question and save using Message model"""
+    def process_question(self, question: str):
+        """Answer a question on the background loop, streaming it into the page"""
+        # The vector store, RAG pipeline and their imports are only loaded
+        # once a question is asked, so the history renders without them
+        from utils.rag import get_chat_state, get_rag_pipeline
+        
+        conversation_id = st.session_state.current_conversation_id
+        next_order = st.session_state.next_order_by_conv
+        
+        # The answer streams into this bubble; the rerun afterwards shows
+        # the saved message in its place
+        with st.chat_message("assistant"):
+            placeholder = st.empty()
+        partial_answers = queue.SimpleQueue()
+        
+        future = run_in_background(self._answer_question(
+            question,
+            conversation_id,
+            next_order.get(conversation_id),
+            get_rag_pipeline(),
+            get_chat_state(),
+            partial_answers.put
+        ))
+        
+        # Streamlit calls have to stay on the script thread, so poll for
+        # streamed text until the answer is stored
+        while not future.done():
+            try:
+                placeholder.markdown(partial_answers.get(timeout=0.1))
+            except queue.Empty:
+                pass
+        
         try:
-            # Create and save user message
-            user_msg = Message(
-                conversation_id=st.session_state.current_conversation_id,
-                role="user",
-                content=question
-            )
-            user_msg.save()
+            next_order[conversation_id] = future.result()
+        except Exception as e:
+            # The counter may be ahead of what was saved; reseed next turn
+            next_order.pop(conversation_id, None)
+            self.logger.error(f"Error processing question: {str(e)}")
+            st.error("I encountered an error while processing your question. Please try again.")
 
-            # Get response from RAG pipeline
-            response = await st.session_state.rag_pipeline.get_answer(question)
-            
-            # Create and save assistant message
-            assistant_msg = Message(
-                conversation_id=st.session_state.current_conversation_id,
-                role="assistant",
-                content=response.answer,
-                confidence=response.confidence
+    async def _answer_question(
+        self,
+        question: str,
+        conversation_id: int,
+        message_order: Optional[int],
+        rag_pipeline: "RAGPipeline",
+        chat_state: "ChatState",
+        on_partial: Callable[[str], None]
+    ) -> int:
+        """Answer a question and save both messages; returns the next message order
+
+        Runs on the background loop, so everything it needs from the
+        session is passed in.
+        """
+        # Seed the order counter once per conversation instead of per turn.
+        # SQLite calls are blocking, so they run on worker threads to keep
+        # the event loop free.
+        if message_order is None:
+            message_order = await asyncio.to_thread(Message.get_next_order, conversation_id)
+
+        # Create and save user message
+        user_msg = Message(
+            conversation_id=conversation_id,
+            role="user",
+            content=question,
+            message_order=message_order
+        )
+        # The answer doesn't depend on the stored question, so write it
+        # while the RAG pipeline runs
+        user_save = asyncio.create_task(asyncio.to_thread(user_msg.save))
+        try:
+            response = await rag_pipeline.get_answer(
+                question, chat_state, on_partial=on_partial
             )
+        finally:
+            # A failed question write is logged but must not discard the answer
+            try:
+                await user_save
+                message_order += 1
+            except Exception as e:
+                self.logger.error(f"Error saving question: {str(e)}")
+        
+        assistant_msg = Message(
+            conversation_id=conversation_id,
+            role="assistant",
+            content=response.answer,
+            confidence=response.confidence,
+            message_order=message_order
+        )
+        await asyncio.to_thread(self._save_answer, assistant_msg, response)
+        return message_order + 1
+
+    @staticmethod
+    def _save_answer(assistant_msg: Message, response) -> None:
+        """Save an assistant message and its sources in one transaction"""
+        # The model saves join this transaction, so the turn commits once
+        with get_db().get_cursor():
             assistant_msg.save()
             
             # Save sources if available
             if hasattr(response, 'sources') and assistant_msg.id:
-                for source in response.sources:
-                    source['message_id'] = assistant_msg.id
-                    MessageSource(**source).save()
-
-        except Exception as e:
-            self.logger.error(f"Error processing question: {str(e)}")
-            st.error("I encountered an error while processing your question. Please try again.")
-
-    def _format_sources(self, sources: List['MessageSource']) -> str:
-        """Format source references for display in markdown"""
-        formatted_sources = []
-        for source in sources:
-            title = getattr(source, 'title', 'Unknown Section')
-            url = getattr(source, 'url', '')
-            relevance = round(getattr(source, 'relevance_score', 0), 2)
-            
-            if url:
-                formatted_sources.append(f"- [{title}]({url}) (Relevance: {relevance})")
-            else:
-                formatted_sources.append(f"- {title} (Relevance: {relevance})")
-                
-        return "\n".join(formatted_sources) if formatted_sources else "No sources available"
+                MessageSource.bulk_insert([
+                    MessageSource(
+                        message_id=assistant_msg.id,
+                        title=source['metadata'].get('title', 'Unknown Section'),
+                        content=source['content'],
+                        url=source['metadata'].get('url'),
+                        relevance_score=source.get('relevance')
+                    )
+                    for source in response.sources
+                ])
 
 def main():
     st.set_page_config(
@@ -295,7 +408,12 @@ def main():
         layout="wide"
     )
     initialize_components()
-    chat = ChatInterface()
+    
+    # One interface per session, kept across reruns
+    if 'chat_interface' not in st.session_state:
+        st.session_state.chat_interface = ChatInterface()
+    chat = st.session_state.chat_interface
+    chat.refresh()
     
     st.title("AWS Documentation Assistant")
     
@@ -313,7 +431,9 @@ def main():
         # Callback to handle input submission
         def handle_input():
             if st.session_state.user_input:
-                if st.session_state.vector_store.get_stats()["total_chunks"] == 0:
+                from utils.vector_store import get_vector_store
+                
+                if get_vector_store().is_empty():
                     st.warning("Please add and scrape some AWS documentation in the Settings page first!")
                 else:
                     # Store the question and clear input
@@ -322,8 +442,7 @@ def main():
                     
                     # Process the question
                     with st.spinner("Searching documentation..."):
-                        loop = get_or_create_eventloop()
-                        loop.run_until_complete(chat.process_question(question))
+                        chat.process_question(question)
                         
         # User input - disabled during processing
         st.text_input(
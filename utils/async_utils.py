@@ -0,0 +1,20 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine
+import streamlit as st
+
+@st.cache_resource(show_spinner=False)
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """Event loop running on a daemon thread, shared by every session"""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="async-loop", daemon=True).start()
+    return loop
+
+def run_in_background(coro: Coroutine[Any, Any, Any]) -> Future:
+    """Schedule a coroutine on the background loop
+
+    The coroutine runs without a script context, so it must not call
+    Streamlit APIs or read st.session_state.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_background_loop())
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import List, Optional
+import numpy as np
 
 @dataclass
 class ContentWarning:
@@ -15,30 +16,51 @@ class ContentProcessor:
     MEDIUM_THRESHOLD = 2500   # Getting large
     LARGE_THRESHOLD = 4000    # Needs attention
     
+    # (threshold, level, message template), largest threshold first
+    _BUCKETS = (
+        (LARGE_THRESHOLD, 'high',
+         "🚨 Section '{title}' is very large ({length} chars) and may need chunking"),
+        (MEDIUM_THRESHOLD, 'medium',
+         "⚠️ Section '{title}' is large ({length} chars) and may need chunking"),
+        (WARNING_THRESHOLD, 'low',
+         "ℹ️ Section '{title}' is approaching size limit ({length} chars)"),
+    )
+    # The same thresholds ascending, for np.searchsorted
+    _THRESHOLDS = np.array([WARNING_THRESHOLD, MEDIUM_THRESHOLD, LARGE_THRESHOLD])
+    
     @staticmethod
     def check_content_length(content: str, title: str) -> Optional[ContentWarning]:
         """Check content length and return warning if needed"""
         content_length = len(content)
         
-        if content_length > ContentProcessor.LARGE_THRESHOLD:
-            return ContentWarning(
-                level='high',
-                message=f"🚨 Section '{title}' is very large ({content_length} chars) and may need chunking",
-                title=title,
-                content_length=content_length
-            )
-        elif content_length > ContentProcessor.MEDIUM_THRESHOLD:
-            return ContentWarning(
-                level='medium',
-                message=f"⚠️ Section '{title}' is large ({content_length} chars) and may need chunking",
-                title=title,
-                content_length=content_length
-            )
-        elif content_length > ContentProcessor.WARNING_THRESHOLD:
-            return ContentWarning(
-                level='low',
-                message=f"ℹ️ Section '{title}' is approaching size limit ({content_length} chars)",
-                title=title,
+        # Most sections are under every threshold
+        if content_length <= ContentProcessor.WARNING_THRESHOLD:
+            return None
+        
+        for threshold, level, template in ContentProcessor._BUCKETS:
+            if content_length > threshold:
+                return ContentWarning(
+                    level=level,
+                    message=template.format(title=title, length=content_length),
+                    title=title,
+                    content_length=content_length
+                )
+    
+    @staticmethod
+    def check_content_length_batch(contents: List[str], titles: List[str]) -> List[ContentWarning]:
+        """Check many sections at once and return the warnings, in input order"""
+        lengths = np.fromiter(map(len, contents), dtype=np.int64, count=len(contents))
+        # Number of thresholds each length exceeds: 0 = fine, 3 = 'high'
+        buckets = np.searchsorted(ContentProcessor._THRESHOLDS, lengths, side='left')
+        
+        warnings = []
+        for i in np.flatnonzero(buckets):
+            _, level, template = ContentProcessor._BUCKETS[3 - buckets[i]]
+            content_length = int(lengths[i])
+            warnings.append(ContentWarning(
+                level=level,
+                message=template.format(title=titles[i], length=content_length),
+                title=titles[i],
                 content_length=content_length
-            )
-        return None
\ No newline at end of file
+            ))
+        return warnings
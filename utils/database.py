@@ -1,11 +1,14 @@
 from __future__ import annotations
 import sqlite3
+import threading
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
-from typing import Optional, Dict, List, Generator, Any, TypeVar, Tuple
+from typing import Optional, Dict, List, Generator, Iterator, Any, TypeVar, Tuple
 from dataclasses import dataclass
 from urllib.parse import urljoin
 import json
@@ -46,27 +49,52 @@ class ContentWarning:
 class DatabaseConnection:
     def __init__(self, db_path: str = 'rag_settings.db'):
         self.db_path = db_path
+        # One connection for the instance's lifetime instead of one per
+        # cursor; Streamlit reruns on new threads, hence check_same_thread.
+        # Transactions are opened explicitly in get_cursor.
+        self._conn = sqlite3.connect(
+            db_path,
+            check_same_thread=False,
+            isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        self._conn.executescript('''
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA cache_size=-64000;
+        ''')
     
     @contextmanager
     def get_connection(self) -> Generator[sqlite3.Connection, None, None]:
-        """Context manager for database connections"""
-        conn = sqlite3.connect(self.db_path)
-        try:
-            yield conn
-        finally:
-            conn.close()
+        """Context manager granting exclusive use of the shared connection"""
+        with self._lock:
+            yield self._conn
     
     @contextmanager
-    def get_cursor(self) -> Generator[sqlite3.Cursor, None, None]:
-        """Context manager for database cursors"""
+    def get_cursor(self, immediate: bool = False) -> Generator[sqlite3.Cursor, None, None]:
+        """Context manager for database cursors
+
+        A cursor requested inside an open transaction joins it. With
+        immediate=True the write lock is taken when the transaction begins.
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            if conn.in_transaction:
+                yield cursor
+                return
+            cursor.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
             try:
                 yield cursor
                 conn.commit()
             except Exception as e:
                 conn.rollback()
                 raise e
+    
+    def close(self) -> None:
+        """Close the underlying connection"""
+        self._conn.close()
 
 class Schema:
     """Database schema management"""
@@ -157,6 +185,28 @@ class Schema:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (message_source_id) REFERENCES message_sources(id) ON DELETE CASCADE
             )
+        ''',
+        'idx_msg_conv_created': '''
+            CREATE INDEX IF NOT EXISTS idx_msg_conv_created
+            ON messages (conversation_id, created_at DESC)
+        ''',
+        'idx_msg_conv_order': '''
+            CREATE INDEX IF NOT EXISTS idx_msg_conv_order
+            ON messages (conversation_id, message_order DESC)
+        ''',
+        # get_sections seeds its recursive CTE with a URL's root sections
+        # and then joins children on parent_id
+        'idx_sections_url_parent': '''
+            CREATE INDEX IF NOT EXISTS idx_sections_url_parent
+            ON sections (url_id, parent_id, section_order)
+        ''',
+        'idx_sections_parent': '''
+            CREATE INDEX IF NOT EXISTS idx_sections_parent
+            ON sections (parent_id)
+        ''',
+        'idx_content_url': '''
+            CREATE INDEX IF NOT EXISTS idx_content_url
+            ON content (url_id)
         '''
     }
 
@@ -177,65 +227,116 @@ class ContentProcessor:
     MEDIUM_THRESHOLD = 2500   # Getting large
     LARGE_THRESHOLD = 4000    # Needs attention
     
+    # (threshold, level, message template), largest threshold first
+    _TIERS = (
+        (LARGE_THRESHOLD, 'high',
+         "🚨 Section '{title}' is very large ({length} chars) and may need chunking"),
+        (MEDIUM_THRESHOLD, 'medium',
+         "⚠️ Section '{title}' is large ({length} chars) and may need chunking"),
+        (WARNING_THRESHOLD, 'low',
+         "ℹ️ Section '{title}' is approaching size limit ({length} chars)"),
+    )
+    
     @staticmethod
     def check_content_length(content: str, title: str) -> Optional[ContentWarning]:
         """Check content length and return warning if needed"""
         content_length = len(content)
         
-        if content_length > ContentProcessor.LARGE_THRESHOLD:
-            return ContentWarning(
-                level='high',
-                message=f"🚨 Section '{title}' is very large ({content_length} chars) and may need chunking",
-                title=title,
-                content_length=content_length
-            )
-        elif content_length > ContentProcessor.MEDIUM_THRESHOLD:
-            return ContentWarning(
-                level='medium',
-                message=f"⚠️ Section '{title}' is large ({content_length} chars) and may need chunking",
-                title=title,
-                content_length=content_length
-            )
-        elif content_length > ContentProcessor.WARNING_THRESHOLD:
-            return ContentWarning(
-                level='low',
-                message=f"ℹ️ Section '{title}' is approaching size limit ({content_length} chars)",
-                title=title,
-                content_length=content_length
-            )
-        return None
+        # Most sections are under every threshold; only then is a
+        # message formatted
+        if content_length <= ContentProcessor.WARNING_THRESHOLD:
+            return None
+        
+        for threshold, level, template in ContentProcessor._TIERS:
+            if content_length > threshold:
+                return ContentWarning(
+                    level=level,
+                    message=template.format(title=title, length=content_length),
+                    title=title,
+                    content_length=content_length
+                )
 
 class DocumentScraper:
     """Handles document scraping and section extraction"""
     
     def __init__(self, db: DatabaseConnection):
         self.db = db
+        # One session for every scrape so connections to the docs host
+        # are kept alive and reused
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_maxsize=16))
+    
+    MAX_WORKERS = 8  # Pages fetched at once by scrape_urls
     
     def scrape_url(self, url: str) -> Optional[Tuple[str, List[Section]]]:
         """Scrape content from a URL, maintaining document hierarchy"""
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(['script', 'style']):
-                script.decompose()
-
-            # Extract title
-            title = soup.title.string if soup.title else url
-            
-            # Extract hierarchical sections
-            sections = self._extract_sections(soup, url)
-            
-            return title, sections
-            
+            title, sections, warnings = self._scrape(url)
         except Exception as e:
             st.error(f"Error scraping {url}: {str(e)}")
             return None
+        self._record_warnings(warnings)
+        return title, sections
+    
+    def scrape_urls(self, urls: List[str]) -> List[Optional[Tuple[str, List[Section]]]]:
+        """Scrape several URLs concurrently over the shared session
+
+        Results are in input order, with None for a URL that failed.
+        """
+        def scrape(url: str):
+            # Errors are returned rather than raised so one failure
+            # doesn't lose the other pages' results
+            try:
+                return self._scrape(url)
+            except Exception as e:
+                return e
+        
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            outcomes = list(executor.map(scrape, urls))
+        
+        # Streamlit calls stay on the script thread
+        results = []
+        for url, outcome in zip(urls, outcomes):
+            if isinstance(outcome, Exception):
+                st.error(f"Error scraping {url}: {str(outcome)}")
+                results.append(None)
+            else:
+                title, sections, warnings = outcome
+                self._record_warnings(warnings)
+                results.append((title, sections))
+        return results
+    
+    def _scrape(self, url: str) -> Tuple[str, List[Section], List[ContentWarning]]:
+        """Fetch and parse a page; safe to call from worker threads"""
+        response = self.session.get(url, timeout=(5, 30))
+        response.raise_for_status()
+        
+        soup = BeautifulSoup(response.content, 'lxml')
+        
+        # Remove script and style elements
+        for script in soup(['script', 'style']):
+            script.decompose()
+
+        # Extract title
+        title = soup.title.string if soup.title else url
+        
+        # Extract hierarchical sections
+        warnings = []
+        sections = self._extract_sections(soup, url, warnings)
+        
+        return title, sections, warnings
     
-    def _extract_sections(self, soup: BeautifulSoup, base_url: str) -> List[Section]:
+    @staticmethod
+    def _record_warnings(warnings: List[ContentWarning]) -> None:
+        """Add a page's content warnings to the session, once per page"""
+        if warnings:
+            if 'content_warnings' not in st.session_state:
+                st.session_state.content_warnings = []
+            st.session_state.content_warnings.extend(warnings)
+    
+    def _extract_sections(
+        self, soup: BeautifulSoup, base_url: str, warnings: List[ContentWarning]
+    ) -> List[Section]:
         """Extract hierarchical sections from AWS documentation"""
         main_content = soup.find('div', {'id': 'main-content'}) or soup.find('main')
         if not main_content:
@@ -245,7 +346,7 @@ class DocumentScraper:
         section_stack = []
         
         for header in main_content.find_all(['h1', 'h2', 'h3']):
-            section = self._process_header(header, base_url)
+            section = self._process_header(header, base_url, warnings)
             
             # Handle hierarchy
             while section_stack and section_stack[-1].level >= section.level:
@@ -260,7 +361,9 @@ class DocumentScraper:
 
         return sections
     
-    def _process_header(self, header: BeautifulSoup, base_url: str) -> Section:
+    def _process_header(
+        self, header: BeautifulSoup, base_url: str, warnings: List[ContentWarning]
+    ) -> Section:
         """Process a single header element and its content"""
         level = int(header.name[1])
         url_fragment = self._get_header_id(header)
@@ -270,9 +373,7 @@ class DocumentScraper:
         # Check content length and add warning if needed
         warning = ContentProcessor.check_content_length(content, title)
         if warning:
-            if 'content_warnings' not in st.session_state:
-                st.session_state.content_warnings = []
-            st.session_state.content_warnings.append(warning)
+            warnings.append(warning)
         
         return Section(
             title=title,
@@ -358,14 +459,18 @@ class Database:
             st.error("This URL already exists in the database!")
             return False
     
-    def get_urls(self) -> List[URL]:
-        """Retrieve all URLs from the database"""
+    def get_urls(self, limit: Optional[int] = None, offset: int = 0) -> List[URL]:
+        """Retrieve URLs from the database, newest first, optionally one page at a time"""
         with self.db.get_cursor() as cursor:
+            # LIMIT -1 is SQLite for no limit
             cursor.execute('''
                 SELECT id, url, description, added_date, last_scraped 
                 FROM urls 
                 ORDER BY added_date DESC
-            ''')
+                LIMIT ? OFFSET ?
+            ''', (-1 if limit is None else limit, offset))
+            # Rows are built straight from the cursor rather than from an
+            # intermediate fetchall() list
             return [
                 URL(
                     id=row[0],
@@ -374,7 +479,7 @@ class Database:
                     added_date=row[3],
                     last_scraped=row[4]
                 )
-                for row in cursor.fetchall()
+                for row in cursor
             ]
     
     def delete_url(self, url_id: int) -> None:
@@ -385,7 +490,9 @@ class Database:
     def save_sections(self, url_id: int, title: str, sections: List[Section]) -> bool:
         """Save scraped sections to database"""
         try:
-            with self.db.get_cursor() as cursor:
+            # Take the write lock up front so the whole save is one
+            # transaction with a single commit
+            with self.db.get_cursor(immediate=True) as cursor:
                 # Update last_scraped timestamp
                 cursor.execute(
                     'UPDATE urls SET last_scraped = ? WHERE id = ?',
@@ -395,9 +502,8 @@ class Database:
                 # Clear old sections
                 cursor.execute('DELETE FROM sections WHERE url_id = ?', (url_id,))
                 
-                # Save new sections
-                for i, section in enumerate(sections):
-                    self._save_section_recursive(cursor, url_id, section, None, i)
+                # Save new sections one depth level at a time
+                self._save_section_levels(cursor, url_id, sections)
                 
             return True
             
@@ -405,30 +511,50 @@ class Database:
             st.error(f"Error saving content: {str(e)}")
             return False
     
-    def _save_section_recursive(
+    def _save_section_levels(
         self, 
         cursor: sqlite3.Cursor, 
         url_id: int, 
-        section: Section, 
-        parent_id: Optional[int] = None, 
-        order: int = 0
+        sections: List[Section]
     ) -> None:
-        """Recursively save a section and its subsections"""
-        cursor.execute('''
-            INSERT INTO sections (
-                url_id, parent_id, title, content, 
-                level, url_fragment, section_order
+        """Insert a section tree with one executemany per depth level"""
+        # Each entry is (parent_id, order, section)
+        level = [(None, i, section) for i, section in enumerate(sections)]
+        while level:
+            cursor.executemany('''
+                INSERT INTO sections (
+                    url_id, parent_id, title, content, 
+                    level, url_fragment, section_order
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', self._level_rows(url_id, level))
+            
+            # The write lock is held, so this level's rows are the newest
+            # for the URL; ids ascend in insert order
+            cursor.execute(
+                'SELECT id FROM sections WHERE url_id = ? ORDER BY id DESC LIMIT ?',
+                (url_id, len(level))
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+            
+            # The ids just assigned become the next level's parent ids
+            level = [
+                (section_id, i, subsection)
+                for section_id, (_, _, section) in zip(reversed(ids), level)
+                for i, subsection in enumerate(section.subsections)
+            ]
+    
+    @staticmethod
+    def _level_rows(
+        url_id: int, 
+        level: List[Tuple[Optional[int], int, Section]]
+    ) -> Iterator[Tuple]:
+        """Yield insert rows for one depth level without building a list"""
+        for parent_id, order, section in level:
+            yield (
+                url_id, parent_id, section.title, section.content,
+                section.level, section.url_fragment, order
             )
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            url_id, parent_id, section.title, section.content,
-            section.level, section.url_fragment, order
-        ))
-        
-        section_id = cursor.lastrowid
-        
-        for i, subsection in enumerate(section.subsections):
-            self._save_section_recursive(cursor, url_id, subsection, section_id, i)
     
     def get_sections(self, url_id: int) -> List[Section]:
         """Retrieve hierarchical sections for a URL"""
@@ -457,20 +583,8 @@ class Database:
                 ORDER BY section_order, depth;
             ''', (url_id,))
             
-            columns = [description[0] for description in cursor.description]
             return [
-                Section(
-                    id=row[columns.index('id')],
-                    parent_id=row[columns.index('parent_id')],
-                    title=row[columns.index('title')],
-                    content=row[columns.index('content')],
-                    level=row[columns.index('level')],
-                    url_fragment=row[columns.index('url_fragment')],
-                    section_order=row[columns.index('section_order')],
-                    depth=row[columns.index('depth')],
-                    path=row[columns.index('path')],
-                    subsections=[]
-                )
+                Section(**dict(row), subsections=[])
                 for row in cursor.fetchall()
             ]
 
@@ -553,27 +667,35 @@ class Database:
     def get_conversations(self) -> List[Dict]:
         """Get all conversations with their latest message"""
         with self.db.get_cursor() as cursor:
+            # One pass over messages ranks each conversation's messages and
+            # counts them; rank 1 is the latest message
             cursor.execute('''
+                WITH ranked AS (
+                    SELECT
+                        conversation_id,
+                        content,
+                        ROW_NUMBER() OVER latest AS rn,
+                        COUNT(*) OVER (
+                            latest ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+                        ) AS message_count
+                    FROM messages
+                    WINDOW latest AS (
+                        PARTITION BY conversation_id
+                        ORDER BY created_at DESC, id DESC
+                    )
+                )
                 SELECT 
                     c.id,
                     c.title,
                     c.created_at,
                     c.updated_at,
                     c.metadata,
-                    m.content as latest_message,
-                    COUNT(messages.id) as message_count
+                    substr(r.content, 1, 50)
+                        || CASE WHEN length(r.content) > 50 THEN '...' ELSE '' END
+                        as preview,
+                    COALESCE(r.message_count, 0) as message_count
                 FROM conversations c
-                LEFT JOIN messages ON c.id = messages.conversation_id
-                LEFT JOIN (
-                    SELECT conversation_id, content
-                    FROM messages m2
-                    WHERE (conversation_id, created_at) IN (
-                        SELECT conversation_id, MAX(created_at)
-                        FROM messages
-                        GROUP BY conversation_id
-                    )
-                ) m ON c.id = m.conversation_id
-                GROUP BY c.id
+                LEFT JOIN ranked r ON r.conversation_id = c.id AND r.rn = 1
                 ORDER BY c.updated_at DESC
             ''')
             return [{
@@ -582,7 +704,7 @@ class Database:
                 'created_at': row[2],
                 'updated_at': row[3],
                 'metadata': json.loads(row[4]) if row[4] else {},
-                'preview': row[5][:50] + "..." if row[5] and len(row[5]) > 50 else (row[5] or ''),
+                'preview': row[5] or '',
                 'message_count': row[6]
             } for row in cursor.fetchall()]
 
@@ -0,0 +1,150 @@
+# The scraper's worker processes import only this module, so it must not
+# import Streamlit or the database layer
+from dataclasses import dataclass
+from typing import Optional, List, Tuple
+import lxml.html
+from lxml.etree import XPath
+from lxml.html import HtmlElement
+from utils.content_processor import ContentProcessor, ContentWarning
+
+HEADER_TAGS = ('h1', 'h2', 'h3')
+
+# XPath expressions are compiled once at import instead of on every call
+_SCRIPT_STYLE_XPATH = XPath('//script|//style')
+_MAIN_CONTENT_XPATH = XPath('//div[@id="main-content"]')
+_MAIN_XPATH = XPath('//main')
+_HEADERS_XPATH = XPath('.//h1|.//h2|.//h3')
+_SECTION_ANCESTOR_XPATH = XPath(
+    'ancestor::*[contains(concat(" ", normalize-space(@class), " "), " awsdocs-section ")][1]'
+)
+_TEXT_XPATH = XPath('.//text()')
+
+@dataclass(slots=True)
+class ParsedSection:
+    """A section as parsed from a page, before it is saved"""
+    title: str
+    content: str
+    level: int
+    url_fragment: str
+    section_order: int
+    depth: int = 0
+    path: Optional[str] = None
+
+def parse_html(html: bytes, url: str) -> Tuple[str, List[ParsedSection], List[ContentWarning]]:
+    """Parse a page into its title, sections and content warnings"""
+    tree = lxml.html.document_fromstring(html)
+
+    # Remove script and style elements
+    for script in _SCRIPT_STYLE_XPATH(tree):
+        script.drop_tree()
+
+    # Extract title
+    title = tree.findtext('.//title') or url
+
+    # Extract hierarchical sections
+    warnings = []
+    sections = _extract_sections(tree, url, warnings)
+
+    return title, sections, warnings
+
+def _extract_sections(
+    tree: HtmlElement, base_url: str, warnings: List[ContentWarning]
+) -> List[ParsedSection]:
+    """Extract hierarchical sections from AWS documentation"""
+    main_content = _MAIN_CONTENT_XPATH(tree) or _MAIN_XPATH(tree)
+    if not main_content:
+        return []
+
+    sections = []
+    section_stack = []
+    section_order = 0
+
+    # XPath returns the headers in document order
+    for header in _HEADERS_XPATH(main_content[0]):
+        section = _process_header(header, base_url, section_order)
+        section_order += 1
+
+        # Handle hierarchy
+        while section_stack and section_stack[-1].level >= section.level:
+            section_stack.pop()
+
+        # Parent ids are only known once saved; depth and path aren't
+        section.depth = len(section_stack)
+        section.path = (
+            f"{section_stack[-1].path} > {section.title}" if section_stack else section.title
+        )
+
+        section_stack.append(section)
+        sections.append(section)
+
+    # Check content lengths for the whole page in one pass
+    warnings.extend(ContentProcessor.check_content_length_batch(
+        [section.content for section in sections],
+        [section.title for section in sections]
+    ))
+    return sections
+
+def _process_header(header: HtmlElement, base_url: str, order: int) -> ParsedSection:
+    """Process a single header element and its content"""
+    level = int(header.tag[1])
+    url_fragment = _get_header_id(header)
+    content = _extract_content(header)
+    title = _stripped_text(header)
+
+    return ParsedSection(
+        title=title,
+        content=content,
+        level=level,
+        url_fragment=url_fragment,
+        section_order=order
+    )
+
+def _get_header_id(header: HtmlElement) -> str:
+    """Extract header ID or find nearby ID"""
+    url_fragment = header.get('id', '')
+    if not url_fragment and header.get('class'):
+        nearby_id = _SECTION_ANCESTOR_XPATH(header)
+        if nearby_id:
+            url_fragment = nearby_id[0].get('id', '')
+    return url_fragment
+
+def _extract_content(header: HtmlElement) -> str:
+    """Extract content following a header until the next header"""
+    content_elements = []
+    current_element = header.getnext()
+
+    while current_element is not None and current_element.tag not in HEADER_TAGS:
+        if content := _process_element(current_element):
+            content_elements.append(content)
+        current_element = current_element.getnext()
+
+    return '\n'.join(content_elements)
+
+def _process_element(element: HtmlElement) -> Optional[str]:
+    """Process a single content element"""
+    # Comments are siblings too; their tag is not a string and matches nothing
+    if element.tag == 'p':
+        text = ' '.join(element.text_content().split())
+        return text if text else None
+
+    elif element.tag in ('ul', 'ol'):
+        list_items = []
+        for li in element.iter('li'):
+            text = ' '.join(li.text_content().split())
+            if text:
+                list_items.append(f"• {text}")
+        return '\n'.join(list_items) if list_items else None
+
+    elif element.tag == 'pre':
+        code = _stripped_text(element)
+        return f"```\n{code}\n```" if code else None
+
+    elif element.tag == 'code':
+        code = _stripped_text(element)
+        return f"`{code}`" if code else None
+
+    return None
+
+def _stripped_text(element: HtmlElement) -> str:
+    """Text of an element with each text node stripped, as bs4's get_text(strip=True)"""
+    return ''.join(text.strip() for text in _TEXT_XPATH(element))
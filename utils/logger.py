@@ -4,7 +4,9 @@ from datetime import datetime
 from typing import Optional, Union, List
 import json
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+import atexit
+import queue
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 
 class Logger:
     """
@@ -42,7 +44,8 @@ class Logger:
         file_handler = RotatingFileHandler(
             self.log_file, 
             maxBytes=10*1024*1024,  # 10MB
-            backupCount=5
+            backupCount=5,
+            delay=True
         )
         file_handler.setLevel(logging.DEBUG)
         
@@ -53,8 +56,12 @@ class Logger:
         )
         file_handler.setFormatter(formatter)
         
-        # Add handler to logger
-        self.file_logger.addHandler(file_handler)
+        # Callers only enqueue records; a listener thread does the file I/O
+        log_queue = queue.SimpleQueue()
+        self.file_logger.addHandler(QueueHandler(log_queue))
+        self._listener = QueueListener(log_queue, file_handler)
+        self._listener.start()
+        atexit.register(self._listener.stop)
         
         self._initialized = True
 
@@ -99,35 +106,50 @@ class Logger:
             
         logs = []
         try:
-            with open(self.log_file, 'r') as f:
-                lines = f.readlines()
-                if n_lines:
-                    lines = lines[-n_lines:]
+            if n_lines:
+                lines = self._tail_lines(n_lines)
+            else:
+                with open(self.log_file, 'r') as f:
+                    lines = f.readlines()
                     
-                for line in lines:
-                    try:
-                        # Parse log line
-                        parts = line.strip().split(' - ', 2)
-                        if len(parts) == 3:
-                            timestamp, level, message = parts
-                            
-                            # Apply level filter if specified
-                            if level_filter and level.strip() != level_filter:
-                                continue
-                                
-                            logs.append({
-                                'timestamp': timestamp,
-                                'level': level.strip(),
-                                'message': message
-                            })
-                    except Exception:
-                        continue
+            for line in lines:
+                try:
+                    # Parse log line
+                    parts = line.strip().split(' - ', 2)
+                    if len(parts) == 3:
+                        timestamp, level, message = parts
                         
+                        # Apply level filter if specified
+                        if level_filter and level.strip() != level_filter:
+                            continue
+                            
+                        logs.append({
+                            'timestamp': timestamp,
+                            'level': level.strip(),
+                            'message': message
+                        })
+                except Exception:
+                    continue
+                    
         except Exception as e:
             print(f"Error reading log file: {e}")
             
         return logs
 
+    def _tail_lines(self, n_lines: int, block_size: int = 64 * 1024) -> List[str]:
+        """Read the last n_lines of the log file without reading all of it"""
+        with open(self.log_file, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            data = b''
+            # Read whole blocks backwards until enough line breaks are buffered
+            while position > 0 and data.count(b'\n') <= n_lines:
+                read_size = min(block_size, position)
+                position -= read_size
+                f.seek(position)
+                data = f.read(read_size) + data
+        return data.decode('utf-8', errors='replace').splitlines()[-n_lines:]
+
     def clear_logfile(self):
         """Clear the contents of the log file"""
         try:
@@ -1,11 +1,14 @@
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Callable, Tuple
 import streamlit as st
 from datetime import datetime
 from dataclasses import dataclass
-from utils.vector_store import VectorStore, Document
+from utils.vector_store import VectorStore, Document, get_vector_store
 from utils.logger import Logger
+from utils.semantic_cache import SemanticCache
 from langchain_google_genai import ChatGoogleGenerativeAI, HarmCategory, HarmBlockThreshold
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+import asyncio
+import numpy as np
 import os
 import hashlib
 import re
@@ -18,7 +21,7 @@ class RAGResponse:
     sources: List[Dict]  # List of source chunks with metadata
     confidence: float    # Overall confidence score (0-1)
     
-@dataclass
+@dataclass(slots=True, frozen=True)
 class LLMHistoryItem:
     """Represents a full context + message pair for LLM history"""
     role: str  # "system", "user", or "assistant" 
@@ -26,7 +29,7 @@ class LLMHistoryItem:
     context: Optional[str] = None  # The context provided for this message
     timestamp: datetime = field(default_factory=datetime.now)
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class UIMessage:
     """Message format for chat interface"""
     role: str  # "user" or "assistant"
@@ -34,12 +37,120 @@ class UIMessage:
     sources: Optional[str] = None
     confidence: Optional[float] = None
     
+SYSTEM_PROMPT = """You are an AWS documentation assistant. Your role is to provide accurate, 
+                    helpful answers about AWS services and features based on the provided documentation context.
+                    Only answer based on the provided context. If the context doesn't contain enough information,
+                    say so. 
+                    
+                    When referring to documentation, use the exact format [[Title](URL)] for citations, where Title
+                    and URL match those provided in the context. Always include at least one citation per statement."""
+
+@dataclass(slots=True)
+class ChatState:
+    """One session's chat history, passed to the shared pipeline explicitly"""
+    llm_history: List[LLMHistoryItem] = field(
+        default_factory=lambda: [LLMHistoryItem(role="system", content=SYSTEM_PROMPT)]
+    )
+    ui_messages: List[UIMessage] = field(default_factory=list)
+    used_chunks: set = field(default_factory=set)  # Hashes of chunks already sent to the LLM
+
+class SearchBatcher:
+    """Coalesces searches that arrive close together into batched queries
+
+    Questions from every session are answered on the shared background
+    loop, so a short wait lets concurrent searches share one embedding
+    batch. The blocking vector store query runs on a worker thread.
+    """
+    MAX_BATCH_SIZE = 32
+    MAX_WAIT_SECONDS = 0.05
+
+    def __init__(self, vector_store: VectorStore):
+        self.vector_store = vector_store
+        # Created on first use, inside the loop that serves the searches
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def search(
+        self,
+        query: str,
+        url_id: Optional[int] = None,
+        n_results: int = 10,
+        min_relevance: float = 0.6
+    ) -> Tuple[np.ndarray, List[Dict]]:
+        """Search as part of the next batch; arguments as VectorStore.search_similar
+
+        Returns the query's embedding along with the matching chunks.
+        """
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        result = asyncio.get_running_loop().create_future()
+        await self._queue.put(((url_id, n_results, min_relevance), query, result))
+        return await result
+
+    async def _run(self) -> None:
+        """Collect pending searches and run them, one query per option set"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.MAX_WAIT_SECONDS
+            while len(batch) < self.MAX_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Only searches with the same filter and limits share a query
+            groups: Dict[tuple, List] = {}
+            for options, query, result in batch:
+                groups.setdefault(options, []).append((query, result))
+
+            for (url_id, n_results, min_relevance), items in groups.items():
+                try:
+                    embeddings, results = await asyncio.to_thread(
+                        self._search_group,
+                        [query for query, _ in items],
+                        url_id,
+                        n_results,
+                        min_relevance
+                    )
+                    outcomes = list(zip(embeddings, results))
+                except Exception as e:
+                    outcomes = [e] * len(items)
+                for (_, result), outcome in zip(items, outcomes):
+                    if result.done():  # The caller was cancelled
+                        continue
+                    if isinstance(outcome, Exception):
+                        result.set_exception(outcome)
+                    else:
+                        result.set_result(outcome)
+
+    def _search_group(
+        self,
+        queries: List[str],
+        url_id: Optional[int],
+        n_results: int,
+        min_relevance: float
+    ) -> Tuple[np.ndarray, List[List[Dict]]]:
+        """Embed queries in one batch and search with them; runs on a worker thread"""
+        embeddings = self.vector_store.embed(queries)
+        return embeddings, self.vector_store.search_by_embeddings(
+            embeddings, url_id, n_results, min_relevance
+        )
+
 class RAGPipeline:
     def __init__(self, vector_store: VectorStore):
-        # Track used chunks to avoid repetition
-        if 'used_chunks' not in st.session_state:
-            st.session_state.used_chunks = set()  # Set of chunk hashes
+        # One pipeline is shared by every session (see get_rag_pipeline), so
+        # it keeps no session state; each call gets the session's ChatState
         self.vector_store = vector_store
+        self._search_batcher = SearchBatcher(vector_store)
+        # Answers to standalone questions, reused for near-identical ones
+        # until the vector store changes
+        self._answer_cache = SemanticCache()
+        self._answer_cache_version = vector_store.version
         self.logger = Logger()
         
         # Initialize LLM
@@ -58,24 +169,6 @@ class RAGPipeline:
                 HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
             },
         )
-        
-        # Initialize separate histories
-        if 'llm_history' not in st.session_state:
-            st.session_state.llm_history = [
-                LLMHistoryItem(
-                    role="system",
-                    content="""You are an AWS documentation assistant. Your role is to provide accurate, 
-                    helpful answers about AWS services and features based on the provided documentation context.
-                    Only answer based on the provided context. If the context doesn't contain enough information,
-                    say so. 
-                    
-                    When referring to documentation, use the exact format [[Title](URL)] for citations, where Title
-                    and URL match those provided in the context. Always include at least one citation per statement."""
-                )
-            ]
-            
-        if 'ui_messages' not in st.session_state:
-            st.session_state.ui_messages = []
 
     def _create_source_map(self, chunks: List[Dict]) -> Dict[str, str]:
         """Create a mapping of titles to URLs for source linking"""
@@ -94,14 +187,14 @@ class RAGPipeline:
         metadata = str(sorted(chunk['metadata'].items()))  # Convert metadata to stable string
         return hashlib.md5(f"{content}{metadata}".encode()).hexdigest()
 
-    def _filter_new_chunks(self, chunks: List[Dict]) -> List[Dict]:
+    def _filter_new_chunks(self, chunks: List[Dict], state: ChatState) -> List[Dict]:
         """Filter out chunks that have been used in previous context"""
         new_chunks = []
         for chunk in chunks:
             chunk_hash = self._hash_chunk(chunk)
-            if chunk_hash not in st.session_state.used_chunks:
+            if chunk_hash not in state.used_chunks:
                 new_chunks.append(chunk)
-                st.session_state.used_chunks.add(chunk_hash)
+                state.used_chunks.add(chunk_hash)
         return new_chunks
 
     def _process_response(self, response: str, source_map: Dict[str, str]) -> str:
@@ -119,16 +212,16 @@ class RAGPipeline:
         
         return response
 
-    def format_context(self, chunks: List[Dict], new_chunks_only: bool = True) -> str:
+    def format_context(self, chunks: List[Dict], state: ChatState, new_chunks_only: bool = True) -> str:
         """Format context chunks into a string, optionally marking new chunks"""
         context_parts = []
         for chunk in chunks:
             title = chunk['metadata'].get('title', 'Unknown Section')
-            prefix = "[NEW] " if new_chunks_only and chunk in self._filter_new_chunks(chunks) else ""
+            prefix = "[NEW] " if new_chunks_only and chunk in self._filter_new_chunks(chunks, state) else ""
             context_parts.append(f"{prefix}[{title}]\n{chunk['content']}")
         return "\n\n".join(context_parts)
 
-    def format_sources(self, sources: List[Dict]) -> str:
+    def format_sources(self, sources: List[Dict], state: ChatState) -> str:
         """Format source references for display"""
         formatted_sources = []
         for source in sources:
@@ -137,7 +230,7 @@ class RAGPipeline:
             url = metadata.get('url', '')
             relevance = round(source.get('relevance', 0), 2)
             path = metadata.get('path', '')
-            is_new = self._hash_chunk(source) in self._filter_new_chunks([source])
+            is_new = self._hash_chunk(source) in self._filter_new_chunks([source], state)
             prefix = "[NEW] " if is_new else ""
             
             if url:
@@ -166,15 +259,21 @@ class RAGPipeline:
     async def get_answer(
         self,
         question: str,
+        state: ChatState,
         url_id: Optional[int] = None,
         min_relevance: float = 0,
-        max_chunks: int = 5
+        max_chunks: int = 5,
+        on_partial: Optional[Callable[[str], None]] = None
     ) -> RAGResponse:
-        """Generate an answer using RAG pipeline"""
+        """Generate an answer using RAG pipeline
+
+        If on_partial is given, the answer is streamed from the LLM and
+        on_partial is called with the text received so far after each chunk.
+        """
         self.logger.info(f"Generating answer for question: {question}")
         try:
             # Retrieve and process chunks
-            chunks = self.vector_store.search_similar(
+            embedding, chunks = await self._search_batcher.search(
                 query=question,
                 url_id=url_id,
                 n_results=max_chunks,
@@ -182,15 +281,15 @@ class RAGPipeline:
             )
             
             if not chunks:
-                return self._handle_no_context(question)
+                return self._handle_no_context(question, state)
             
             # Format context
-            context = self.format_context(chunks)
+            context = self.format_context(chunks, state)
             self.logger.info(f"Context: {context}")
             source_map = self._create_source_map(chunks)
             
             # Add question with context to LLM history
-            st.session_state.llm_history.append(
+            state.llm_history.append(
                 LLMHistoryItem(
                     role="user",
                     content=question,
@@ -199,20 +298,42 @@ class RAGPipeline:
             )
             
             # Convert full history to LangChain format
-            llm_messages = self._convert_to_langchain_messages(st.session_state.llm_history)
+            llm_messages = self._convert_to_langchain_messages(state.llm_history)
             self.logger.info(f"LLM messages: {llm_messages}")
             
+            # A question asked with no earlier turns doesn't depend on the
+            # session, so a cached answer to a near-identical one can be reused
+            standalone = len(state.llm_history) == 2  # System prompt and this question
+            if self._answer_cache_version != self.vector_store.version:
+                self._answer_cache.clear()
+                self._answer_cache_version = self.vector_store.version
+            cached_answer = self._answer_cache.get(embedding) if standalone else None
+            
             # Get response from LLM
-            response = await self._llm.ainvoke(llm_messages)
-            self.logger.info(f"LLM response: {response.content}")
-            processed_response = self._process_response(response.content, source_map)
+            if cached_answer is not None:
+                answer = cached_answer
+                self.logger.info("Answer served from semantic cache")
+                if on_partial is not None:
+                    on_partial(answer)
+            elif on_partial is None:
+                response = await self._llm.ainvoke(llm_messages)
+                answer = response.content
+            else:
+                answer = ""
+                async for chunk in self._llm.astream(llm_messages):
+                    answer += chunk.content
+                    on_partial(answer)
+            self.logger.info(f"LLM response: {answer}")
+            if standalone and cached_answer is None:
+                self._answer_cache.put(embedding, answer)
+            processed_response = self._process_response(answer, source_map)
             
             # Calculate confidence
             avg_relevance = sum(chunk.get('relevance', 0) for chunk in chunks) / len(chunks)
-            sources_text = self.format_sources(chunks)
+            sources_text = self.format_sources(chunks, state)
             
             # Add response to LLM history
-            st.session_state.llm_history.append(
+            state.llm_history.append(
                 LLMHistoryItem(
                     role="assistant",
                     content=processed_response
@@ -220,7 +341,7 @@ class RAGPipeline:
             )
             
             # Add to UI messages (clean version)
-            st.session_state.ui_messages.extend([
+            state.ui_messages.extend([
                 UIMessage(role="user", content=question),
                 UIMessage(
                     role="assistant",
@@ -231,7 +352,7 @@ class RAGPipeline:
             ])
             
             # Prune histories if too long
-            self._prune_histories()
+            self._prune_histories(state)
             
             return RAGResponse(
                 answer=processed_response,
@@ -240,60 +361,71 @@ class RAGPipeline:
             )
             
         except Exception as e:
-            return self._handle_error(question, str(e))
+            return self._handle_error(question, str(e), state)
 
-    def _handle_no_context(self, question: str) -> RAGResponse:
+    def _handle_no_context(self, question: str, state: ChatState) -> RAGResponse:
         """Handle case where no relevant context is found"""
         error_msg = "I don't have enough context in my knowledge base to answer this question."
         
         # Add to histories
-        st.session_state.llm_history.append(
+        state.llm_history.append(
             LLMHistoryItem(role="user", content=question)
         )
-        st.session_state.llm_history.append(
+        state.llm_history.append(
             LLMHistoryItem(role="assistant", content=error_msg)
         )
         
-        st.session_state.ui_messages.extend([
+        state.ui_messages.extend([
             UIMessage(role="user", content=question),
             UIMessage(role="assistant", content=error_msg, confidence=0.0)
         ])
         
         return RAGResponse(answer=error_msg, sources=[], confidence=0.0)
 
-    def _handle_error(self, question: str, error_msg: str) -> RAGResponse:
+    def _handle_error(self, question: str, error_msg: str, state: ChatState) -> RAGResponse:
         """Handle errors in the RAG pipeline"""
         error_response = f"Error in RAG pipeline: {error_msg}"
         
         # Add to histories
-        st.session_state.llm_history.append(
+        state.llm_history.append(
             LLMHistoryItem(role="user", content=question)
         )
-        st.session_state.llm_history.append(
+        state.llm_history.append(
             LLMHistoryItem(role="assistant", content=error_response)
         )
         
-        st.session_state.ui_messages.extend([
+        state.ui_messages.extend([
             UIMessage(role="user", content=question),
             UIMessage(role="assistant", content=error_response, confidence=0.0)
         ])
         
         return RAGResponse(answer=error_response, sources=[], confidence=0.0)
 
-    def _prune_histories(self, max_turns: int = 10):
+    def _prune_histories(self, state: ChatState, max_turns: int = 10):
         """Prune both histories while maintaining consistency"""
         # Keep system message plus last max_turns * 2 messages (each turn is Q&A)
-        if len(st.session_state.llm_history) > (max_turns * 2 + 1):
-            st.session_state.llm_history = (
-                [st.session_state.llm_history[0]] +  # Keep system message
-                st.session_state.llm_history[-(max_turns * 2):]  # Keep last N turns
+        if len(state.llm_history) > (max_turns * 2 + 1):
+            state.llm_history = (
+                [state.llm_history[0]] +  # Keep system message
+                state.llm_history[-(max_turns * 2):]  # Keep last N turns
             )
         
         # Keep last max_turns * 2 UI messages
-        if len(st.session_state.ui_messages) > (max_turns * 2):
-            st.session_state.ui_messages = st.session_state.ui_messages[-(max_turns * 2):]
+        if len(state.ui_messages) > (max_turns * 2):
+            state.ui_messages = state.ui_messages[-(max_turns * 2):]
 
-    def clear_history(self):
+    def clear_history(self, state: ChatState):
         """Clear both conversation histories"""
-        st.session_state.llm_history = [st.session_state.llm_history[0]]  # Keep only system message
-        st.session_state.ui_messages = []  # Clear UI messages
\ No newline at end of file
+        state.llm_history = [state.llm_history[0]]  # Keep only system message
+        state.ui_messages = []  # Clear UI messages
+
+def get_chat_state() -> ChatState:
+    """The current session's chat state, created on first use"""
+    if 'chat_state' not in st.session_state:
+        st.session_state.chat_state = ChatState()
+    return st.session_state.chat_state
+
+@st.cache_resource(show_spinner=False)
+def get_rag_pipeline() -> RAGPipeline:
+    """Shared RAGPipeline, so the LLM client is created once per process"""
+    return RAGPipeline(get_vector_store())
@@ -1,129 +1,104 @@
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import atexit
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+import aiohttp
 from typing import Optional, List, Tuple
-import streamlit as st
 from db.models.section import Section
-from utils.content_processor import ContentProcessor, ContentWarning
+from utils.content_processor import ContentWarning
+from utils.html_parser import parse_html
+
+# Parsing is CPU-bound and holds the GIL, so it runs in worker processes.
+# Created on first use; spawn avoids forking the threaded Streamlit server.
+# Capped so scraping leaves cores for the server and embedding work.
+PARSE_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_parse_pool() -> ProcessPoolExecutor:
+    global _parse_pool
+    if _parse_pool is None:
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=PARSE_WORKERS,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+        atexit.register(_parse_pool.shutdown, cancel_futures=True)
+    return _parse_pool
 
 class DocumentScraper:
     """Handles document scraping and section extraction"""
     
-    def scrape_url(self, url: str) -> Optional[Tuple[str, List[Section]]]:
-        """Scrape content from a URL, maintaining document hierarchy"""
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(['script', 'style']):
-                script.decompose()
-
-            # Extract title
-            title = soup.title.string if soup.title else url
-            
-            # Extract hierarchical sections
-            sections = self._extract_sections(soup, url)
-            
-            return title, sections
-            
-        except Exception as e:
-            st.error(f"Error scraping {url}: {str(e)}")
-            return None
+    MAX_CONCURRENT_FETCHES = 50  # Simultaneous requests when scraping several URLs
     
-    def _extract_sections(self, soup: BeautifulSoup, base_url: str) -> List[Section]:
-        """Extract hierarchical sections from AWS documentation"""
-        main_content = soup.find('div', {'id': 'main-content'}) or soup.find('main')
-        if not main_content:
-            return []
-
-        sections = []
-        section_stack = []
-        section_order = 0
-        
-        for header in main_content.find_all(['h1', 'h2', 'h3']):
-            section = self._process_header(header, base_url, section_order)
-            section_order += 1
-            
-            # Handle hierarchy
-            while section_stack and section_stack[-1].level >= section.level:
-                section_stack.pop()
-
-            if section_stack:
-                section.parent_id = section_stack[-1].id
-                
-            section_stack.append(section)
-            sections.append(section)
-
-        return sections
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._close_registered = False
     
-    def _process_header(self, header: BeautifulSoup, base_url: str, order: int) -> Section:
-        """Process a single header element and its content"""
-        level = int(header.name[1])
-        url_fragment = self._get_header_id(header)
-        content = self._extract_content(header)
-        title = header.get_text(strip=True)
+    async def scrape_url_async(
+        self, url: str, session: Optional[aiohttp.ClientSession] = None
+    ) -> Tuple[str, List[Section], List[ContentWarning]]:
+        """Scrape content from a URL, maintaining document hierarchy
+
+        Runs on the background loop, so warnings and errors are returned
+        or raised for the caller to show rather than written to the page.
+        """
+        if session is None:
+            session = self._get_session()
+        html = await self._fetch(session, url)
         
-        # Create section instance
-        section = Section(
-            title=title,
-            content=content,
-            level=level,
-            url_fragment=url_fragment,
-            section_order=order
+        # Parse in a worker process so other fetches keep progressing
+        # on the event loop
+        loop = asyncio.get_running_loop()
+        title, parsed, warnings = await loop.run_in_executor(
+            _get_parse_pool(), parse_html, html, url
         )
+        return title, [Section(**asdict(section)) for section in parsed], warnings
+    
+    async def scrape_urls_async(
+        self, urls: List[str]
+    ) -> List[Optional[Tuple[str, List[Section], List[ContentWarning]]]]:
+        """Scrape several URLs concurrently over one shared HTTP session
+
+        A URL that fails to scrape gives None in its place.
+        """
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_FETCHES)
+        session = self._get_session()
         
-        # Check content length and add warning if needed
-        warning = ContentProcessor.check_content_length(content, title)
-        if warning:
-            if 'content_warnings' not in st.session_state:
-                st.session_state.content_warnings = []
-            st.session_state.content_warnings.append(warning)
-        
-        return section
+        async def scrape(url: str) -> Optional[Tuple[str, List[Section], List[ContentWarning]]]:
+            async with semaphore:
+                try:
+                    return await self.scrape_url_async(url, session)
+                except Exception:
+                    return None
+        return await asyncio.gather(*(scrape(url) for url in urls))
     
-    def _get_header_id(self, header: BeautifulSoup) -> str:
-        """Extract header ID or find nearby ID"""
-        url_fragment = header.get('id', '')
-        if not url_fragment and header.get('class'):
-            nearby_id = header.find_parent(class_='awsdocs-section')
-            if nearby_id:
-                url_fragment = nearby_id.get('id', '')
-        return url_fragment
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Long-lived HTTP session reused across scrapes"""
+        # Keeping one session keeps pooled connections and resolved hosts
+        # warm; it is bound to the running loop, so call it from inside it
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.MAX_CONCURRENT_FETCHES,
+                    keepalive_timeout=30
+                )
+            )
+            # One exit handler closes whichever session is current, so a
+            # recreated session doesn't add another
+            if not self._close_registered:
+                atexit.register(self._close_session, asyncio.get_running_loop())
+                self._close_registered = True
+        return self._session
     
-    def _extract_content(self, header: BeautifulSoup) -> str:
-        """Extract content following a header until the next header"""
-        content_elements = []
-        current_element = header.find_next_sibling()
-        
-        while current_element and current_element.name not in ['h1', 'h2', 'h3']:
-            if content := self._process_element(current_element):
-                content_elements.append(content)
-            current_element = current_element.find_next_sibling()
-        
-        return '\n'.join(content_elements)
+    def _close_session(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Close the HTTP session on interpreter exit"""
+        # The loop is still running on its own thread, so hand it the close
+        if self._session and not self._session.closed and loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._session.close(), loop).result(timeout=5)
     
-    def _process_element(self, element: BeautifulSoup) -> Optional[str]:
-        """Process a single content element"""
-        if element.name == 'p':
-            text = ' '.join(element.get_text().split())
-            return text if text else None
-            
-        elif element.name in ['ul', 'ol']:
-            list_items = []
-            for li in element.find_all('li'):
-                text = ' '.join(li.get_text().split())
-                if text:
-                    list_items.append(f"• {text}")
-            return '\n'.join(list_items) if list_items else None
-            
-        elif element.name == 'pre':
-            code = element.get_text(strip=True)
-            return f"```\n{code}\n```" if code else None
-            
-        elif element.name == 'code':
-            code = element.get_text(strip=True)
-            return f"`{code}`" if code else None
-            
-        return None
\ No newline at end of file
+    async def _fetch(self, session: aiohttp.ClientSession, url: str) -> bytes:
+        """Download a page's HTML undecoded; the parser detects the encoding"""
+        async with session.get(url) as response:
+            response.raise_for_status()
+            return await response.read()
@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+import numpy as np
+
+class SemanticCache:
+    """
+    LRU cache with expiry, keyed by embedding similarity rather than equality
+
+    Embeddings live in one preallocated matrix, so a lookup is a single
+    matrix-vector product. Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        threshold: float = 0.95,
+        ttl_seconds: float = 3600
+    ):
+        """
+        Args:
+            max_entries: Entries kept before the least recently used is evicted
+            threshold: Minimum cosine similarity for a lookup to hit
+            ttl_seconds: How long an entry stays valid after it is stored
+        """
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.RLock()
+        # Row -> (expiry time, value), least recently used first
+        self._entries: OrderedDict[int, tuple] = OrderedDict()
+        # Allocated on the first put, once the embedding size is known
+        self._matrix: Optional[np.ndarray] = None
+        self._used: Optional[np.ndarray] = None
+
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray:
+        embedding = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm else embedding
+
+    def get(self, embedding: np.ndarray) -> Optional[Any]:
+        """Value stored under the most similar embedding, if similar enough and fresh"""
+        query = self._normalize(embedding)
+        with self._lock:
+            if not self._entries:
+                return None
+            scores = self._matrix @ query
+            scores[~self._used] = -np.inf
+            row = int(np.argmax(scores))
+            if scores[row] < self.threshold:
+                return None
+
+            expires_at, value = self._entries[row]
+            if expires_at < time.monotonic():
+                del self._entries[row]
+                self._used[row] = False
+                return None
+
+            self._entries.move_to_end(row)
+            return value
+
+    def put(self, embedding: np.ndarray, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if full"""
+        key = self._normalize(embedding)
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, key.shape[0]), dtype=np.float32)
+                self._used = np.zeros(self.max_entries, dtype=bool)
+
+            if len(self._entries) >= self.max_entries:
+                row, _ = self._entries.popitem(last=False)
+            else:
+                row = int(np.flatnonzero(~self._used)[0])
+
+            self._matrix[row] = key
+            self._used[row] = True
+            self._entries[row] = (time.monotonic() + self.ttl_seconds, value)
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            if self._used is not None:
+                self._used[:] = False
@@ -1,13 +1,18 @@
-from typing import List, Dict
+from typing import List
 import re
+from functools import lru_cache
 from utils.vector_store import Document
+from db.models.section import Section
 import tiktoken
 
+@lru_cache(maxsize=None)
+def _get_encoder() -> tiktoken.Encoding:
+    """cl100k_base encoder (used by latest GPT models), loaded once"""
+    return tiktoken.get_encoding("cl100k_base")
+
 def estimate_tokens(text: str) -> int:
     """Estimate the number of tokens in a text string"""
-    # Use cl100k_base encoder (used by latest GPT models)
-    encoder = tiktoken.get_encoding("cl100k_base")
-    return len(encoder.encode(text))
+    return len(_get_encoder().encode(text))
 
 def chunk_section_content(
     content: str,
@@ -84,7 +89,7 @@ def chunk_section_content(
     return chunks
 
 def process_section_content(
-    section: Dict,
+    section: Section,
     url: str,
     chunk_size: int = 512,  # Now in tokens
     overlap: int = 50  # Now in tokens
@@ -93,19 +98,19 @@ def process_section_content(
     Process section content into vector store documents
     
     Args:
-        section: Section dictionary from database
+        section: Saved section
         url: Base URL for the document
         chunk_size: Target chunk size in tokens
         overlap: Number of tokens to overlap
     """
     # Skip empty content
-    if not section.get('content'):
+    if not section.content:
         return []
     
     # Include title and path in content for better context
-    full_content = f"{section['title']}\n\n{section['content']}"
-    if section.get('path'):
-        full_content = f"Path: {section['path']}\n\n{full_content}"
+    full_content = f"{section.title}\n\n{section.content}"
+    if section.path:
+        full_content = f"Path: {section.path}\n\n{full_content}"
     
     # Split content into chunks
     content_chunks = chunk_section_content(
@@ -114,19 +119,23 @@ def process_section_content(
         overlap=overlap
     )
     
+    # Count tokens for all chunks in one call; tiktoken spreads a batch
+    # across threads
+    token_counts = [len(tokens) for tokens in _get_encoder().encode_batch(content_chunks)]
+    
     # Create document objects
     documents = []
     for i, chunk in enumerate(content_chunks):
         # Prepare metadata
         metadata = {
-            'title': str(section['title']),
-            'section_id': str(section['id']),
-            'level': str(section['level']),
-            'path': str(section['path']),
-            'url': str(f"{url}#{section.get('url_fragment', '')}"),
+            'title': str(section.title),
+            'section_id': str(section.id),
+            'level': str(section.level),
+            'path': str(section.path),
+            'url': str(f"{url}#{section.url_fragment or ''}"),
             'chunk_index': str(i),
             'total_chunks': str(len(content_chunks)),
-            'token_count': str(estimate_tokens(chunk))
+            'token_count': str(token_counts[i])
         }
         
         # Create document
@@ -140,7 +149,7 @@ def process_section_content(
     return documents
 
 def prepare_sections_for_indexing(
-    sections: List[Dict],
+    sections: List[Section],
     url: str,
     chunk_size: int = 512,  # Now in tokens
     overlap: int = 50  # Now in tokens
@@ -149,7 +158,7 @@ def prepare_sections_for_indexing(
     Process all sections into documents for vector store
     
     Args:
-        sections: List of sections from database
+        sections: List of saved sections
         url: Base URL for the document
         chunk_size: Target chunk size in tokens
         overlap: Number of tokens to overlap
@@ -157,7 +166,7 @@ def prepare_sections_for_indexing(
     documents = []
     
     # Process sections in hierarchical order
-    sorted_sections = sorted(sections, key=lambda x: x.get('path', ''))
+    sorted_sections = sorted(sections, key=lambda x: x.path or '')
     
     for section in sorted_sections:
         section_docs = process_section_content(
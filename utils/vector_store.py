@@ -37,6 +37,12 @@ class VectorStore:
             name="aws_docs",
             embedding_function=self.embedding_func
         )
+        
+        # Chunk count, fetched lazily and reset whenever this store writes
+        self._chunk_count: Optional[int] = None
+        # Incremented on every write, so caches built on search results
+        # can tell when they are stale
+        self.version = 0
     
     def add_section_chunks(self, chunks: List[Document], url_id: int) -> bool:
         """
@@ -76,6 +82,8 @@ class VectorStore:
                 ids=chunk_ids,
                 metadatas=metadatas
             )
+            self._chunk_count = None
+            self.version += 1
             
             return True
             
@@ -99,53 +107,114 @@ class VectorStore:
             n_results: Number of results to return
             min_relevance: Minimum relevance score (0-1)
         """
+        return self.search_similar_batch([query], url_id, n_results, min_relevance)[0]
+
+    def search_similar_batch(
+        self,
+        queries: List[str],
+        url_id: Optional[int] = None,
+        n_results: int = 10,
+        min_relevance: float = 0.6
+    ) -> List[List[Dict]]:
+        """
+        Search for several queries at once, embedding them in one batch
+        
+        Args:
+            queries: Search queries
+            url_id: Optional URL ID filter
+            n_results: Number of results to return per query
+            min_relevance: Minimum relevance score (0-1)
+            
+        Returns:
+            One result list per query, in the order given
+        """
+        return self.search_by_embeddings(self.embed(queries), url_id, n_results, min_relevance)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts with the collection's embedding model, one row per text"""
+        return np.asarray(self.embedding_func(texts), dtype=np.float32)
+
+    def search_by_embeddings(
+        self,
+        embeddings: np.ndarray,
+        url_id: Optional[int] = None,
+        n_results: int = 10,
+        min_relevance: float = 0.6
+    ) -> List[List[Dict]]:
+        """
+        Search with precomputed query embeddings
+        
+        Args:
+            embeddings: Query embeddings, one row per query, as from embed()
+            url_id: Optional URL ID filter
+            n_results: Number of results to return per query
+            min_relevance: Minimum relevance score (0-1)
+            
+        Returns:
+            One result list per query, in the order given
+        """
         try:
             # Prepare where clause if url_id provided
             where = {"url_id": str(url_id)} if url_id is not None else None
             
             # Query collection with increased n_results to account for filtering
             results = self.collection.query(
-                query_texts=[query],
+                query_embeddings=embeddings.tolist(),
                 n_results=n_results * 2,  # Get more results initially
                 where=where,
                 include=["documents", "metadatas", "distances"]
             )
             
-            # Format results with better relevance scoring
-            documents = []
-            if results['ids'] and results['ids'][0]:
-                for i in range(len(results['ids'][0])):
-                    # Calculate relevance score with improved scaling
-                    distance = results['distances'][0][i]
-                    # Sigmoid-like transformation for better relevance distribution
-                    relevance = 1 / (1 + np.exp(distance * 2 - 1))
-                    
-                    # Skip if below minimum relevance
-                    if relevance < min_relevance:
-                        continue
-                        
-                    # Get token count if available
-                    token_count = int(results['metadatas'][0][i].get('token_count', '0'))
-                    
-                    # Boost relevance for larger chunks (more context)
-                    if token_count > 0:
-                        size_boost = min(token_count / 512, 1.2)  # Max 20% boost
-                        relevance *= size_boost
-                    
-                    documents.append({
-                        'id': results['ids'][0][i],
-                        'content': results['documents'][0][i],
-                        'metadata': results['metadatas'][0][i],
-                        'relevance': relevance
-                    })
-            
-            # Sort by relevance and limit to n_results
-            documents.sort(key=lambda x: x['relevance'], reverse=True)
-            return documents[:n_results]
+            return [
+                self._format_results(results, q, n_results, min_relevance)
+                for q in range(len(embeddings))
+            ]
             
         except Exception as e:
-            st.error(f"Error searching vector store: {str(e)}")
-            return []
+            # This runs on the search batcher's worker thread, which has no
+            # Streamlit context; the caller surfaces the raised error
+            Logger().error(f"Error searching vector store: {str(e)}")
+            raise
+
+    def _format_results(
+        self,
+        results: Dict,
+        q: int,
+        n_results: int,
+        min_relevance: float
+    ) -> List[Dict]:
+        """Score, filter and rank the matches for the q-th query of a search"""
+        # Format results with better relevance scoring
+        documents = []
+        if results['ids'] and results['ids'][q]:
+            for i in range(len(results['ids'][q])):
+                # Calculate relevance score with improved scaling
+                distance = results['distances'][q][i]
+                # Sigmoid-like transformation for better relevance distribution
+                relevance = 1 / (1 + np.exp(distance * 2 - 1))
+                
+                # Skip if below minimum relevance
+                if relevance < min_relevance:
+                    continue
+                    
+                # Get token count if available
+                token_count = int(results['metadatas'][q][i].get('token_count', '0'))
+                
+                # Boost relevance for larger chunks (more context)
+                if token_count > 0:
+                    size_boost = min(token_count / 512, 1.2)  # Max 20% boost
+                    relevance *= size_boost
+                
+                documents.append({
+                    'id': results['ids'][q][i],
+                    'content': results['documents'][q][i],
+                    'metadata': results['metadatas'][q][i],
+                    'relevance': relevance
+                })
+        
+        # Sort by relevance and limit to n_results
+        documents.sort(key=lambda x: x['relevance'], reverse=True)
+        return documents[:n_results]
 
 
     def delete_url_content(self, url_id: int) -> bool:
@@ -155,18 +224,39 @@ class VectorStore:
             self.collection.delete(
                 where={"url_id": str(url_id)}
             )
+            self._chunk_count = None
+            self.version += 1
             return True
         except Exception as e:
             st.error(f"Error deleting chunks from vector store: {str(e)}")
             return False
 
+    def is_empty(self) -> bool:
+        """Whether the store holds no chunks, using the cached count"""
+        try:
+            return self._get_chunk_count() == 0
+        except Exception as e:
+            st.error(f"Error getting vector store stats: {str(e)}")
+            return True
+
+    def _get_chunk_count(self) -> int:
+        """Chunk count, counted once and reused until the next write"""
+        if self._chunk_count is None:
+            self._chunk_count = self.collection.count()
+        return self._chunk_count
+
     def get_stats(self) -> Dict:
         """Get vector store statistics"""
         try:
             return {
-                "total_chunks": self.collection.count(),
+                "total_chunks": self._get_chunk_count(),
                 "embedding_dims": 384  # all-MiniLM-L6-v2 produces 384-dim embeddings
             }
         except Exception as e:
             st.error(f"Error getting vector store stats: {str(e)}")
-            return {"total_chunks": 0, "embedding_dims": 0}
\ No newline at end of file
+            return {"total_chunks": 0, "embedding_dims": 0}
+
+@st.cache_resource(show_spinner=False)
+def get_vector_store() -> VectorStore:
+    """Shared VectorStore, so the embedding model loads once per process"""
+    return VectorStore()